@@ -17,7 +17,8 @@ You should have received a copy of the GNU General Public License
 along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
-from typing import Type
+import os
+from typing import Type, Dict, List
 from jerrycan.Config import Config as BaseConfig
 from bokkichat.connection.impl.TelegramBotConnection import \
     TelegramBotConnection
@@ -38,6 +39,36 @@ class Config(BaseConfig):
     Single Telegram bot connection used for all telegram communications
     """
 
+    ANILIST_WORKERS: int = 4
+    """
+    The amount of anilist lists that may be fetched concurrently
+    """
+
+    ANILIST_REQUESTS_PER_MINUTE: int = 60
+    """
+    The maximum amount of requests per minute sent to anilist by the
+    list update task. Lists are loaded in chunks, each chunk is a
+    separate request
+    """
+
+    ANILIST_USERS_PER_RUN: int = 200
+    """
+    The maximum amount of users whose anilist lists are synced per run
+    of the list update task
+    """
+
+    JOB_TIME_BUDGET: int = 60 * 30
+    """
+    The amount of seconds a long-running background job may run per
+    invocation before it saves its progress and stops
+    """
+
+    PAGE_CACHE_PATH: str = os.path.join("/tmp", "otaku_info-page-cache")
+    """
+    The directory in which downloaded web pages and the data extracted from
+    them are cached
+    """
+
     @classmethod
     def _load_extras(cls, parent: Type[BaseConfig]):
         """
@@ -49,3 +80,32 @@ class Config(BaseConfig):
         parent.TEMPLATE_EXTRAS.update({
             "profile": profile_extras
         })
+        cls.ANILIST_WORKERS = int(os.environ.get("ANILIST_WORKERS", "4"))
+        cls.ANILIST_REQUESTS_PER_MINUTE = int(
+            os.environ.get("ANILIST_REQUESTS_PER_MINUTE", "60")
+        )
+        cls.ANILIST_USERS_PER_RUN = int(
+            os.environ.get("ANILIST_USERS_PER_RUN", "200")
+        )
+        cls.JOB_TIME_BUDGET = int(os.environ.get("JOB_TIME_BUDGET", "1800"))
+        cls.PAGE_CACHE_PATH = os.environ.get(
+            "PAGE_CACHE_PATH", os.path.join("/tmp", "otaku_info-page-cache")
+        )
+
+    @classmethod
+    def environment_variables(cls) -> Dict[str, List[str]]:
+        """
+        Specifies required and optional environment variables
+        :return: The specified environment variables in two lists in
+                 a dictionary, grouped by whether the variables are
+                 required or optional
+        """
+        variables = super().environment_variables()
+        variables["optional"] += [
+            "ANILIST_WORKERS",
+            "ANILIST_REQUESTS_PER_MINUTE",
+            "ANILIST_USERS_PER_RUN",
+            "JOB_TIME_BUDGET",
+            "PAGE_CACHE_PATH"
+        ]
+        return variables
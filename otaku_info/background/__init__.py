@@ -19,7 +19,9 @@ LICENSE"""
 
 from typing import Dict, Tuple, Callable
 from otaku_info.background.anilist import update_anilist_data
-from otaku_info.background.mangadex import update_mangadex_data
+from otaku_info.background.mangadex import update_mangadex_data, \
+    update_all_mangadex_data, update_tracked_mangadex_data
+from otaku_info.background.mangadex_chapters import update_mangadex_chapters
 from otaku_info.background.anilist_manga_chapter_guesses import \
     update_anilist_manga_chapter_guesses
 from otaku_info.background.notifications import send_new_update_notifications
@@ -30,6 +32,9 @@ bg_tasks: Dict[str, Tuple[int, Callable]] = {
     "anilist_update": (60 * 5, update_anilist_data),
     "anilist_chapter_guesses": (60 * 30, update_anilist_manga_chapter_guesses),
     "mangadex_update": (60 * 60 * 24, update_mangadex_data),
+    "mangadex_full_update": (60 * 60, update_all_mangadex_data),
+    "mangadex_tracked_update": (60 * 60, update_tracked_mangadex_data),
+    "mangadex_chapter_feed": (60 * 15, update_mangadex_chapters),
     "update_notifications": (60, send_new_update_notifications),
     "ln_release_updates": (60 * 60 * 24, update_ln_releases)
 }
@@ -18,22 +18,37 @@ along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
 import time
-from typing import List, Optional, Dict
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, Future, wait, \
+    FIRST_COMPLETED
+from typing import List, Optional, Dict, Tuple, Generator, Iterable, Set
+from requests import ConnectionError
 from jerrycan.base import app, db
 
-from otaku_info.db import MediaList, MediaListItem, MediaIdMapping
+from otaku_info.Config import Config
+from otaku_info.db import MediaList, MediaListItem, MediaIdMapping, \
+    MediaItem, MediaUserState, ListFingerprint
 from otaku_info.enums import ListService, MediaType
 from otaku_info.utils.object_conversion import anime_list_item_to_media_item, \
     anilist_user_item_to_media_user_state
 from otaku_info.db.ServiceUsername import ServiceUsername
 from otaku_info.external.anilist import load_anilist
 from otaku_info.external.entities.AnilistUserItem import AnilistUserItem
+from otaku_info.utils.rate_limiting import RateLimiter
+from otaku_info.utils.upsert import bulk_upsert
+from otaku_info.utils.sync_queue import get_due_usernames, mark_synced
 
 
 def update_anilist_data(usernames: Optional[List[ServiceUsername]] = None):
     """
-    Retrieves all entries on the anilists of all users that provided
-    an anilist username
+    Retrieves all entries on the anilists of users that provided
+    an anilist username.
+    The users are taken from the front of the sync queue, at most
+    ANILIST_USERS_PER_RUN users are synced per run.
+    Lists are written to the database as soon as they were fetched.
+    Lists whose contents did not change since the last update are skipped.
+    Users whose lists could not be fetched completely are not marked as
+    synced, so that they are retried in the next run.
     :param usernames: Can be used to override the usernames to use
     :return: None
     """
@@ -41,100 +56,223 @@ def update_anilist_data(usernames: Optional[List[ServiceUsername]] = None):
     app.logger.info("Starting Anilist Update")
 
     if usernames is None:
-        usernames = ServiceUsername.query\
-            .filter_by(service=ListService.ANILIST).all()
-
-    anilist_data: Dict[
-        ServiceUsername,
-        Dict[MediaType, List[AnilistUserItem]]
-    ] = {
-        username: {
-            media_type: load_anilist(username.username, media_type)
-            for media_type in MediaType
-        }
-        for username in usernames
+        usernames = get_due_usernames(
+            ListService.ANILIST, Config.ANILIST_USERS_PER_RUN
+        )
+
+    stored_fingerprints = {
+        (x.user_id, x.media_type): x.fingerprint
+        for x in ListFingerprint.query.filter_by(service=ListService.ANILIST)
     }
-    __update_data(anilist_data)
+    skipped_lists: Dict[int, int] = {}
+    failed_users: Set[int] = set()
+
+    for username, media_type, anilist_items in \
+            __fetch_anilist_lists(usernames):
+        if anilist_items is None:
+            failed_users.add(username.user_id)
+            continue
+
+        fingerprint = __generate_fingerprint(anilist_items)
+        key = (username.user_id, media_type)
+        if stored_fingerprints.get(key) == fingerprint:
+            skipped_lists[username.user_id] = \
+                skipped_lists.get(username.user_id, 0) + 1
+            continue
+
+        __update_data(username, anilist_items)
+        bulk_upsert(ListFingerprint, [ListFingerprint(
+            user_id=username.user_id,
+            service=ListService.ANILIST,
+            media_type=media_type,
+            fingerprint=fingerprint,
+            last_update=int(time.time())
+        )])
+        db.session.commit()
+
+    mark_synced([x for x in usernames if x.user_id not in failed_users])
+    if len(failed_users) > 0:
+        app.logger.warning(f"Failed to fetch the lists of "
+                           f"{len(failed_users)}/{len(usernames)} "
+                           f"anilist users")
+    skipped_users = len([
+        x for x in skipped_lists.values() if x == len(MediaType)
+    ])
+    app.logger.info(f"Skipped {skipped_users}/{len(usernames)} "
+                    f"anilist users with unchanged lists")
     app.logger.info(f"Finished Anilist Update in {time.time() - start}s.")
 
 
+def __fetch_anilist_lists(usernames: List[ServiceUsername]) -> Generator[
+    Tuple[ServiceUsername, MediaType, Optional[List[AnilistUserItem]]],
+    None,
+    None
+]:
+    """
+    Fetches the anilist lists of multiple users concurrently.
+    The amount of concurrent fetches as well as the request rate are
+    limited by the ANILIST_WORKERS and ANILIST_REQUESTS_PER_MINUTE
+    configuration values. Each chunk of a list counts as a request.
+    Each list is fetched completely before it is yielded, since its
+    fingerprint decides whether it needs to be written at all.
+    To keep the memory usage bounded, new fetches are only started once
+    the fetched lists are consumed, so that at most twice as many lists as
+    there are workers are held in memory at once.
+    :param usernames: The usernames for which to fetch the lists
+    :return: A generator that yields the username, the media type and
+             the entries of each list as soon as the list was fetched.
+             The entries are None if the list could not be fetched
+             completely
+    """
+    rate_limiter = RateLimiter(Config.ANILIST_REQUESTS_PER_MINUTE)
+
+    def fetch(username: str, media_type: MediaType) \
+            -> Tuple[Optional[List[AnilistUserItem]], float]:
+        """
+        Fetches a single list while respecting the rate limit
+        :param username: The anilist username
+        :param media_type: The media type of the list
+        :return: The list entries, or None if the list could not be
+                 fetched completely, and the time it took to fetch them
+        """
+        fetch_start = time.time()
+        try:
+            items: Optional[List[AnilistUserItem]] = list(load_anilist(
+                username, media_type, rate_limiter=rate_limiter
+            ))
+        except ConnectionError as e:
+            app.logger.warning(str(e))
+            items = None
+        return items, time.time() - fetch_start
+
+    jobs = [
+        (username, media_type)
+        for username in usernames
+        for media_type in MediaType
+    ]
+    max_pending = 2 * Config.ANILIST_WORKERS
+
+    with ThreadPoolExecutor(max_workers=Config.ANILIST_WORKERS) as executor:
+        futures: Dict[Future, Tuple[ServiceUsername, MediaType]] = {}
+        while len(jobs) > 0 or len(futures) > 0:
+            while len(jobs) > 0 and len(futures) < max_pending:
+                username, media_type = jobs.pop(0)
+                future = executor.submit(fetch, username.username, media_type)
+                futures[future] = (username, media_type)
+
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                username, media_type = futures.pop(future)
+                items, duration = future.result()
+                if items is not None:
+                    app.logger.debug(
+                        f"Fetched {len(items)} anilist {media_type.value} "
+                        f"entries for {username.username} in "
+                        f"{duration:.2f}s"
+                    )
+                yield username, media_type, items
+
+
+def __generate_fingerprint(anilist_items: List[AnilistUserItem]) -> str:
+    """
+    Generates a fingerprint for the contents of an anilist list.
+    The fingerprint does not depend on the order of the entries.
+    :param anilist_items: The entries of the list
+    :return: The fingerprint
+    """
+    entries = sorted(
+        repr(sorted(item.fields().items(), key=lambda x: x[0]))
+        for item in anilist_items
+    )
+    return hashlib.sha256("\n".join(entries).encode("utf-8")).hexdigest()
+
+
 def __update_data(
-        anilist_data: Dict[
-            ServiceUsername,
-            Dict[MediaType, List[AnilistUserItem]]
-        ]
+        username: ServiceUsername,
+        anilist_items: Iterable[AnilistUserItem],
+        batch_size: int = 500
 ):
     """
-    Updates the anilist data in the database
-    :param anilist_data: The anilist data to enter
+    Updates the anilist data of a user in the database.
+    The entries are converted and written in batches while
+    they are being consumed.
+    Does not commit the changes.
+    :param username: The user to whom the entries belong
+    :param anilist_items: The anilist entries to enter
+    :param batch_size: The amount of entries to write at once
     :return: None
     """
-    media_items = {}
-    user_states = []
-    user_lists = {}
-    user_list_items = []
-    mal_mappings = []
-
-    for username, anilist_info in anilist_data.items():
-        for media_type, anilist_items in anilist_info.items():
-            for anilist_item in anilist_items:
-                media_item = anime_list_item_to_media_item(anilist_item)
-                user_state = anilist_user_item_to_media_user_state(
-                    anilist_item, username.user_id
-                )
-                media_list = MediaList(
-                    service=ListService.ANILIST,
-                    media_type=anilist_item.media_type,
-                    user_id=username.user_id,
-                    name=anilist_item.list_name
-                )
-                media_list_item = MediaListItem(
-                    media_list_service=media_list.service,
-                    media_list_media_type=media_list.media_type,
-                    media_list_user_id=media_list.user_id,
-                    media_list_name=media_list.name,
-                    user_state_service=user_state.service,
-                    user_state_media_type=user_state.media_type,
-                    user_state_user_id=user_state.user_id,
-                    user_state_service_id=user_state.service_id
-                )
-                media_item_tuple = (
-                    media_item.service,
-                    media_item.service_id,
-                    media_item.media_type
-                )
-                media_list_tuple = (
-                    media_list.service,
-                    media_list.media_type,
-                    media_list.user_id,
-                    media_list.name
-                )
-                media_items[media_item_tuple] = media_item
-                user_states.append(user_state)
-                user_lists[media_list_tuple] = media_list
-                user_list_items.append(media_list_item)
-                if anilist_item.myanimelist_id is not None:
-                    mal_mapping = MediaIdMapping(
-                        service=ListService.MYANIMELIST,
-                        service_id=str(anilist_item.myanimelist_id),
-                        parent_service=ListService.ANILIST,
-                        parent_service_id=media_item.service_id,
-                        media_type=media_item.media_type
-                    )
-                    mal_mappings.append(mal_mapping)
-
-    for media_item in media_items.values():
-        app.logger.debug(f"Upserting anilist item {media_item.title}")
-        db.session.merge(media_item)
-    for user_state in user_states:
-        db.session.merge(user_state)
-    for media_list in user_lists.values():
-        db.session.merge(media_list)
-    for media_list_item in user_list_items:
-        db.session.merge(media_list_item)
-    for mal_mapping in mal_mappings:
-        db.session.merge(mal_mapping)
-        app.logger.debug(f"Upserting id mapping: "
-                         f"anilist:{mal_mapping.parent_service_id} "
-                         f"-> myanimelist:{mal_mapping.service_id}")
-    db.session.commit()
+    media_items: Dict[Tuple, MediaItem] = {}
+    user_states: List[MediaUserState] = []
+    user_lists: Dict[Tuple, MediaList] = {}
+    user_list_items: List[MediaListItem] = []
+    mal_mappings: List[MediaIdMapping] = []
+
+    def flush():
+        """
+        Writes the buffered entries to the database and empties the buffers
+        :return: None
+        """
+        for model, instances in [
+            (MediaItem, media_items.values()),
+            (MediaUserState, user_states),
+            (MediaList, user_lists.values()),
+            (MediaListItem, user_list_items),
+            (MediaIdMapping, mal_mappings)
+        ]:
+            stats = bulk_upsert(model, instances)
+            app.logger.debug(f"Upserted anilist data: {stats}")
+        for container in [
+            media_items, user_states, user_lists, user_list_items, mal_mappings
+        ]:
+            container.clear()
+
+    for anilist_item in anilist_items:
+        media_item = anime_list_item_to_media_item(anilist_item)
+        user_state = anilist_user_item_to_media_user_state(
+            anilist_item, username.user_id
+        )
+        media_list = MediaList(
+            service=ListService.ANILIST,
+            media_type=anilist_item.media_type,
+            user_id=username.user_id,
+            name=anilist_item.list_name
+        )
+        media_list_item = MediaListItem(
+            media_list_service=media_list.service,
+            media_list_media_type=media_list.media_type,
+            media_list_user_id=media_list.user_id,
+            media_list_name=media_list.name,
+            user_state_service=user_state.service,
+            user_state_media_type=user_state.media_type,
+            user_state_user_id=user_state.user_id,
+            user_state_service_id=user_state.service_id
+        )
+        media_item_tuple = (
+            media_item.service,
+            media_item.service_id,
+            media_item.media_type
+        )
+        media_list_tuple = (
+            media_list.service,
+            media_list.media_type,
+            media_list.user_id,
+            media_list.name
+        )
+        media_items[media_item_tuple] = media_item
+        user_states.append(user_state)
+        user_lists[media_list_tuple] = media_list
+        user_list_items.append(media_list_item)
+        if anilist_item.myanimelist_id is not None:
+            mal_mapping = MediaIdMapping(
+                service=ListService.MYANIMELIST,
+                service_id=str(anilist_item.myanimelist_id),
+                parent_service=ListService.ANILIST,
+                parent_service_id=media_item.service_id,
+                media_type=media_item.media_type
+            )
+            mal_mappings.append(mal_mapping)
+
+        if len(user_states) >= batch_size:
+            flush()
+    flush()
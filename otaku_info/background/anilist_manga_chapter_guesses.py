@@ -23,21 +23,32 @@ from jerrycan.base import db, app
 from otaku_info.db.MediaUserState import MediaUserState
 from otaku_info.db.MangaChapterGuess import MangaChapterGuess
 from otaku_info.enums import MediaType, ListService
-from otaku_info.external.anilist import guess_latest_manga_chapter
+from otaku_info.external.anilist import load_manga_progress_samples
+from otaku_info.utils.checkpoints import TimeBudget
 
 
-def update_anilist_manga_chapter_guesses():
+def update_anilist_manga_chapter_guesses(batch_size: int = 50):
     """
-    Updates the manga chapter guesses for anilist items
+    Updates the manga chapter guesses for anilist items.
+    Only guesses that are due for an update are updated, starting with the
+    guess that has been due the longest.
+    Only activities that are newer than the ones already processed are
+    fetched, for multiple manga at once. Each batch is committed at once.
+    Stops once the job time budget is used up. Since the guesses that were
+    updated are no longer due, the next run continues with the remaining
+    ones.
+    :param batch_size: The amount of guesses to update per commit
     :return: None
     """
     start = time.time()
+    budget = TimeBudget()
     app.logger.info("Starting update of manga chapter guesses")
 
-    guesses: List[MangaChapterGuess] = MangaChapterGuess.query.filter_by(
-        service=ListService.ANILIST
-    ).all()
-    existing_ids = [x.service_id for x in guesses]
+    existing_ids = set(
+        service_id for service_id, in
+        db.session.query(MangaChapterGuess.service_id)
+        .filter_by(service=ListService.ANILIST)
+    )
 
     anilist_items: List[MediaUserState] = MediaUserState.query.filter_by(
         service=ListService.ANILIST, media_type=MediaType.MANGA
@@ -45,24 +56,41 @@ def update_anilist_manga_chapter_guesses():
 
     for item in anilist_items:
         if item.service_id not in existing_ids:
-            new_guess = MangaChapterGuess(
+            db.session.add(MangaChapterGuess(
                 service=item.service,
                 service_id=item.service_id,
                 media_type=item.media_type
-            )
-            new_guess = db.session.merge(new_guess)
-            guesses.append(new_guess)
-            existing_ids.append(item.service_id)
+            ))
+            existing_ids.add(item.service_id)
 
     db.session.commit()
 
-    for guess in guesses:
-        app.logger.debug(f"Updating chapter guess for {guess.service_id}")
-        delta = time.time() - guess.last_update
-        if delta > 60 * 60:
-            guess.last_update = int(time.time())
-            guess.guess = guess_latest_manga_chapter(int(guess.service_id))
-            db.session.commit()
+    due: List[MangaChapterGuess] = MangaChapterGuess.query\
+        .filter_by(service=ListService.ANILIST)\
+        .filter(MangaChapterGuess.next_update <= int(time.time()))\
+        .order_by(MangaChapterGuess.next_update)\
+        .options(db.joinedload(MangaChapterGuess.media_item))\
+        .all()
+    app.logger.info(f"{len(due)}/{len(existing_ids)} manga chapter "
+                    f"guesses are due for an update")
+
+    for i in range(0, len(due), batch_size):
+        batch = due[i:i + batch_size]
+        app.logger.debug(f"Updating chapter guesses for "
+                         f"{[x.service_id for x in batch]}")
+        results = load_manga_progress_samples({
+            int(x.service_id): x.last_activity_id for x in batch
+        })
+        for guess in batch:
+            anilist_id = int(guess.service_id)
+            if anilist_id in results:
+                guess.add_samples(results[anilist_id])
+        db.session.commit()
+
+        if budget.exhausted():
+            app.logger.info("Manga chapter guess update used up its "
+                            "time budget")
+            break
 
     app.logger.info(f"Finished updating manga chapter guesses "
                     f"in {time.time() - start}")
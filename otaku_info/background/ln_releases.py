@@ -18,25 +18,50 @@ along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
 import time
-from typing import Dict
+from contextlib import closing
+from typing import Dict, List, Optional
 from jerrycan.base import app, db
 from otaku_info.db import MediaIdMapping
 from otaku_info.db.MediaItem import MediaItem
-from otaku_info.enums import ListService, MediaType
-from otaku_info.external.reddit import load_ln_releases
+from otaku_info.enums import ListService, MediaType, MediaSubType
+from otaku_info.external.entities.RedditLnRelease import RedditLnRelease
+from otaku_info.external.reddit import iterate_ln_releases, \
+    ln_release_years
 from otaku_info.utils.object_conversion import anime_list_item_to_media_item, \
     reddit_ln_release_to_ln_release
 from otaku_info.external.myanimelist import load_myanimelist_item
-from otaku_info.external.anilist import load_anilist_info
+from otaku_info.external.anilist import load_anilist_info_batch
+from otaku_info.utils.checkpoints import TimeBudget, load_checkpoint, \
+    save_checkpoint, clear_checkpoint
+from otaku_info.utils.title_index import TitleIndex
+
+LN_RELEASES_JOB = "ln_releases"
+"""
+The name of the job checkpoint of an unfinished light novel release update.
+The cursor is the next year to update.
+"""
+
+TITLE_MATCH_THRESHOLD = 0.8
+"""
+The minimum similarity a release's series name needs to have with the title
+of a light novel to be linked to it if the release has no myanimelist link
+"""
 
 
 def update_ln_releases():
     """
-    Updates the light novel releases
+    Updates the light novel releases, one year at a time.
+    Stops once the job time budget is used up. The next run then continues
+    with the next year.
     :return: None
     """
     start = time.time()
-    app.logger.info("Starting Reddit LN Update")
+    budget = TimeBudget()
+    years = ln_release_years()
+    checkpoint = load_checkpoint(LN_RELEASES_JOB)
+    if checkpoint is not None and int(checkpoint.cursor) in years:
+        years = years[years.index(int(checkpoint.cursor)):]
+    app.logger.info(f"Starting Reddit LN Update ({years})")
 
     existing_myanimelist_items: Dict[int, MediaItem] = {
         int(x.service_id): x
@@ -57,10 +82,75 @@ def update_ln_releases():
             mal_id = int(mal_mapping.service_id)
             myanimelist_anilist_items[mal_id] = anilist_item
 
-    ln_releases = load_ln_releases()
+    title_index = TitleIndex(
+        [
+            x for x in list(existing_anilist_items.values())
+            + list(existing_myanimelist_items.values())
+            if x.media_subtype == MediaSubType.NOVEL
+        ],
+        TITLE_MATCH_THRESHOLD
+    )
+
+    with closing(iterate_ln_releases(years)) as releases:
+        for i, (_, ln_releases) in enumerate(releases):
+            __update_ln_releases(
+                ln_releases,
+                existing_myanimelist_items,
+                myanimelist_anilist_items,
+                title_index
+            )
+
+            if i == len(years) - 1:
+                clear_checkpoint(LN_RELEASES_JOB)
+            else:
+                save_checkpoint(LN_RELEASES_JOB, str(years[i + 1]))
+                if budget.exhausted():
+                    app.logger.info(
+                        "Reddit LN Update used up its time budget"
+                    )
+                    break
+
+    app.logger.info(
+        f"Matched series names of releases without myanimelist links: "
+        f"{title_index.stats['exact']} exact, "
+        f"{title_index.stats['fuzzy']} similar, "
+        f"{title_index.stats['unmatched']} unmatched"
+    )
+    app.logger.info(f"Finished Reddit LN Update in {time.time() - start}s.")
+
+
+def __update_ln_releases(
+        ln_releases: List[RedditLnRelease],
+        existing_myanimelist_items: Dict[int, MediaItem],
+        myanimelist_anilist_items: Dict[int, MediaItem],
+        title_index: TitleIndex
+):
+    """
+    Stores light novel releases along with the myanimelist and anilist items
+    they are linked to.
+    Releases without a myanimelist link are linked by their series name.
+    :param ln_releases: The light novel releases
+    :param existing_myanimelist_items: The myanimelist items in the database,
+                                       will be extended with new items
+    :param myanimelist_anilist_items: The anilist items in the database,
+                                      mapped to their myanimelist IDs.
+                                      Will be extended with new items
+    :param title_index: Index of the light novels in the database
+    :return: None
+    """
+    anilist_data = load_anilist_info_batch(
+        [
+            x.myanimelist_id for x in ln_releases
+            if x.myanimelist_id is not None
+            and x.myanimelist_id not in myanimelist_anilist_items
+        ],
+        MediaType.MANGA,
+        ListService.MYANIMELIST
+    )
+
     for ln_release in ln_releases:
 
-        items = []
+        items: List[Optional[MediaItem]] = []
         if ln_release.myanimelist_id is not None:
             mal_id = ln_release.myanimelist_id
             mal_item = existing_myanimelist_items.get(mal_id)
@@ -76,9 +166,7 @@ def update_ln_releases():
                     mal_item = db.session.merge(mal_item)
                     existing_myanimelist_items[mal_id] = mal_item
             if anilist_item is None:
-                anilist_info = load_anilist_info(
-                    int(mal_id), MediaType.MANGA, ListService.MYANIMELIST
-                )
+                anilist_info = anilist_data.get(mal_id)
                 if anilist_info is not None:
                     anilist_item = anime_list_item_to_media_item(anilist_info)
                     app.logger.debug(
@@ -105,6 +193,13 @@ def update_ln_releases():
                         parent_service_id=two.service_id
                     ))
             items += [x for x in [anilist_item, mal_item] if x is not None]
+        else:
+            items += __match_series_name(
+                ln_release,
+                existing_myanimelist_items,
+                myanimelist_anilist_items,
+                title_index
+            )
 
         if len(items) == 0:
             items = [None]
@@ -120,4 +215,41 @@ def update_ln_releases():
 
         db.session.commit()
 
-    app.logger.info(f"Finished Reddit LN Update in {time.time() - start}s.")
+
+def __match_series_name(
+        ln_release: RedditLnRelease,
+        existing_myanimelist_items: Dict[int, MediaItem],
+        myanimelist_anilist_items: Dict[int, MediaItem],
+        title_index: TitleIndex
+) -> List[MediaItem]:
+    """
+    Finds the anilist and myanimelist items of a light novel release using
+    its series name
+    :param ln_release: The light novel release
+    :param existing_myanimelist_items: The myanimelist items in the database
+    :param myanimelist_anilist_items: The anilist items in the database,
+                                      mapped to their myanimelist IDs
+    :param title_index: Index of the light novels in the database
+    :return: The matching anilist and myanimelist items
+    """
+    match = title_index.match(ln_release.series_name)
+    if match is None:
+        return []
+    media_item, similarity = match
+
+    if media_item.service == ListService.MYANIMELIST:
+        anilist_item = myanimelist_anilist_items.get(
+            int(media_item.service_id)
+        )
+        mal_item: Optional[MediaItem] = media_item
+    else:
+        anilist_item = media_item
+        mal_mapping = media_item.ids.get(ListService.MYANIMELIST)
+        mal_item = None if mal_mapping is None else \
+            existing_myanimelist_items.get(int(mal_mapping.service_id))
+
+    app.logger.debug(
+        f"Matched {ln_release.series_name} to {media_item.romaji_title} "
+        f"({similarity:.2f})"
+    )
+    return [x for x in [anilist_item, mal_item] if x is not None]
@@ -18,106 +18,365 @@ along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
 import time
-from typing import Optional, List, Tuple
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Dict, Set
+from sqlalchemy import and_
 from jerrycan.base import app, db
 from otaku_info.db.MediaItem import MediaItem
 from otaku_info.db.MediaIdMapping import MediaIdMapping
+from otaku_info.db.MediaUserState import MediaUserState
 from otaku_info.enums import ListService, MediaType
 from otaku_info.external.entities.AnimeListItem import AnimeListItem
 from otaku_info.external.entities.MangadexItem import MangadexItem
-from otaku_info.external.mangadex import fetch_all_mangadex_items
-from otaku_info.external.anilist import load_anilist_info
-from otaku_info.external.myanimelist import load_myanimelist_item
+from otaku_info.external.mangadex import MangadexPaginator, \
+    iterate_mangadex_pages, fetch_mangadex_items_by_id
+from otaku_info.external.anilist import load_anilist_info_batch
+from otaku_info.external.myanimelist import load_myanimelist_items
 from otaku_info.utils.object_conversion import anime_list_item_to_media_item, \
     mangadex_item_to_media_item
+from otaku_info.utils.watermarks import load_watermark, store_watermark, \
+    load_watermark_age
+from otaku_info.utils.upsert import bulk_upsert
+from otaku_info.utils.checkpoints import TimeBudget, load_checkpoint, \
+    save_checkpoint, clear_checkpoint
 
+UPDATED_AT_WATERMARK = "mangadex_updated_at"
+"""
+Watermark that stores the newest mangadex modification date that was
+already imported
+"""
 
-def update_mangadex_data():
+FULL_CRAWL_WATERMARK = "mangadex_full_crawl"
+"""
+Watermark that stores when the last full crawl of mangadex was started
+"""
+
+FULL_CRAWL_INTERVAL = 60 * 60 * 24 * 7
+"""
+The minimum amount of seconds between two full crawls of mangadex
+"""
+
+FULL_CRAWL_JOB = "mangadex_full_crawl"
+"""
+The name of the job checkpoint of an unfinished full crawl of mangadex
+"""
+
+MappingKey = Tuple[ListService, str, ListService]
+"""
+Identifies a manga ID mapping: (parent service, parent ID, service)
+"""
+
+
+def update_all_mangadex_data():
+    """
+    Crawls the entire mangadex catalogue, unless this was already done
+    within the full crawl interval.
+    An unfinished full crawl is always resumed.
+    :return: None
+    """
+    age = load_watermark_age(FULL_CRAWL_WATERMARK)
+    if load_checkpoint(FULL_CRAWL_JOB) is None \
+            and age is not None and age < FULL_CRAWL_INTERVAL:
+        app.logger.info("Skipping full Mangadex crawl")
+    else:
+        update_mangadex_data(full=True)
+
+
+def update_tracked_mangadex_data():
+    """
+    Updates the mangadex entries of all manga that are on a user's list,
+    either directly or through an ID mapping.
+    :return: None
+    """
+    start_time = time.time()
+    app.logger.info("Starting tracked Mangadex Update")
+
+    tracked = set(
+        service_id for service_id, in
+        db.session.query(MediaUserState.service_id).filter_by(
+            service=ListService.MANGADEX, media_type=MediaType.MANGA
+        )
+    )
+    tracked.update(
+        service_id for service_id, in
+        db.session.query(MediaIdMapping.service_id).join(
+            MediaUserState,
+            and_(
+                MediaUserState.service == MediaIdMapping.parent_service,
+                MediaUserState.service_id == MediaIdMapping.parent_service_id,
+                MediaUserState.media_type == MediaIdMapping.media_type
+            )
+        ).filter(
+            MediaIdMapping.service == ListService.MANGADEX,
+            MediaIdMapping.media_type == MediaType.MANGA
+        )
+    )
+
+    existing_ids = __load_existing_ids()
+    existing_mappings = __load_existing_mappings()
+    for page in fetch_mangadex_items_by_id(sorted(tracked)):
+        __process_page(page, existing_ids, existing_mappings)
+
+    app.logger.info(f"Finished tracked Mangadex Update in "
+                    f"{time.time() - start_time}s "
+                    f"({len(tracked)} items).")
+
+
+def update_mangadex_data(full: bool = False):
     """
     Loads the newest mangadex information and updates the mangadex entries in
     the database.
+    By default, only items that were updated since the last update are
+    loaded.
+    Stops once the job time budget is used up. The next run then continues
+    where this run left off.
+    :param full: Whether or not to crawl the entire mangadex catalogue
     :return: None
     """
     start_time = time.time()
-    app.logger.info("Starting Mangadex Update")
-
-    _existing_items = MediaItem.query.all()
-    existing_items = {
-        service: {
-            x.service_id: x
-            for x in _existing_items
-            if x.service == service
-        }
-        for service in ListService
+    budget = TimeBudget()
+    updated_since = load_watermark(UPDATED_AT_WATERMARK)
+    checkpoint = load_checkpoint(FULL_CRAWL_JOB)
+
+    if full and checkpoint is not None:
+        app.logger.info(f"Resuming full Mangadex Update "
+                        f"({checkpoint.cursor})")
+        paginator = MangadexPaginator.from_cursor(checkpoint.cursor)
+    elif full:
+        app.logger.info("Starting full Mangadex Update")
+        paginator = MangadexPaginator()
+        store_watermark(
+            FULL_CRAWL_WATERMARK,
+            datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S")
+        )
+        save_checkpoint(FULL_CRAWL_JOB, paginator.cursor)
+    elif updated_since is None:
+        app.logger.info("No Mangadex watermark stored yet, "
+                        "waiting for full crawl")
+        return
+    else:
+        app.logger.info(f"Starting Mangadex Update (since {updated_since})")
+        paginator = MangadexPaginator("updatedAt", updated_since)
+
+    existing_ids = __load_existing_ids()
+    existing_mappings = __load_existing_mappings()
+
+    item_count = 0
+    interrupted = False
+    for page, cursor in iterate_mangadex_pages(paginator):
+        __process_page(page, existing_ids, existing_mappings)
+        item_count += len(page)
+
+        if full:
+            save_checkpoint(FULL_CRAWL_JOB, cursor)
+        elif updated_since is not None:
+            updated_since = max([updated_since] + [
+                x.updated_at for x in page if x.updated_at is not None
+            ])
+            store_watermark(UPDATED_AT_WATERMARK, updated_since)
+
+        if budget.exhausted():
+            app.logger.info("Mangadex Update used up its time budget")
+            interrupted = True
+            break
+
+    # The paginator may already be complete while pages are still pending
+    if full and paginator.complete and not interrupted:
+        # Items may be modified while the crawl is running. Incremental
+        # updates may have already moved the watermark past the crawl's start
+        checkpoint = load_checkpoint(FULL_CRAWL_JOB)
+        if checkpoint is not None:
+            started_at = datetime.utcfromtimestamp(checkpoint.started_at)\
+                .strftime("%Y-%m-%dT%H:%M:%S")
+            current = load_watermark(UPDATED_AT_WATERMARK)
+            store_watermark(
+                UPDATED_AT_WATERMARK,
+                started_at if current is None else max(current, started_at)
+            )
+        clear_checkpoint(FULL_CRAWL_JOB)
+
+    app.logger.info(f"Finished Mangadex Update in "
+                    f"{time.time() - start_time}s "
+                    f"({item_count} items).")
+
+
+def __load_existing_ids() -> Dict[ListService, Set[str]]:
+    """
+    :return: The IDs of all manga media items in the database,
+             grouped by service
+    """
+    existing_ids: Dict[ListService, Set[str]] = {
+        service: set() for service in ListService
     }
-    fetched_items = fetch_all_mangadex_items()
-
-    mangadex_items: List[Tuple[MediaItem, MangadexItem]] = []
-    for mangadex_item in fetched_items:
-        media_item = mangadex_item_to_media_item(mangadex_item)
-        app.logger.debug(f"Upserting mangadex item {media_item.english_title}")
-        media_item = db.session.merge(media_item)
-        __add_id_mappings(media_item, mangadex_item)
-        mangadex_items.append((media_item, mangadex_item))
-    db.session.commit()
+    for service, service_id in db.session.query(
+            MediaItem.service, MediaItem.service_id
+    ).filter_by(media_type=MediaType.MANGA):
+        existing_ids[service].add(service_id)
+    return existing_ids
+
+
+def __load_existing_mappings() -> Dict[MappingKey, str]:
+    """
+    :return: All manga ID mappings in the database
+    """
+    return {
+        (parent_service, parent_service_id, service): service_id
+        for parent_service, parent_service_id, service, service_id
+        in db.session.query(
+            MediaIdMapping.parent_service,
+            MediaIdMapping.parent_service_id,
+            MediaIdMapping.service,
+            MediaIdMapping.service_id
+        ).filter_by(media_type=MediaType.MANGA)
+    }
+
+
+def __process_page(
+        page: List[MangadexItem],
+        existing_ids: Dict[ListService, Set[str]],
+        existing_mappings: Dict[MappingKey, str]
+):
+    """
+    Stores a page of mangadex items in the database, along with the anilist
+    and myanimelist items they are linked to, then commits.
+    :param page: The mangadex items of the page
+    :param existing_ids: The IDs of the manga media items that already exist
+                         in the database, grouped by service.
+                         Will be extended with new items
+    :param existing_mappings: The manga ID mappings that already exist in
+                              the database. Will be updated with the
+                              written mappings
+    :return: None
+    """
+    mappings: Dict[MappingKey, str] = {}
+    # The latest release may have been raised by the chapter feed
+    stats = bulk_upsert(
+        MediaItem,
+        [mangadex_item_to_media_item(x) for x in page],
+        keep_max=["latest_release"]
+    )
+    app.logger.debug(f"Upserted mangadex items ({stats})")
+    for mangadex_item in page:
+        existing_ids[ListService.MANGADEX].add(mangadex_item.mangadex_id)
+        __add_id_mappings(
+            ListService.MANGADEX,
+            mangadex_item.mangadex_id,
+            mangadex_item,
+            mappings
+        )
+
+    missing_ids: Dict[ListService, List[int]] = {}
+    for service in [ListService.ANILIST, ListService.MYANIMELIST]:
+        missing_ids[service] = [
+            int(x.external_ids[service])
+            for x in page
+            if service in x.external_ids
+            and x.external_ids[service] not in existing_ids[service]
+        ]
 
-    for media_item, mangadex_item in mangadex_items:
+    # Anilist items are loaded in batches while jikan is queried
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        anilist_future = executor.submit(
+            load_anilist_info_batch,
+            missing_ids[ListService.ANILIST],
+            MediaType.MANGA
+        )
+        enrichment: Dict[ListService, Dict[int, AnimeListItem]] = {
+            ListService.MYANIMELIST: dict(load_myanimelist_items(
+                missing_ids[ListService.MYANIMELIST], MediaType.MANGA
+            )),
+            ListService.ANILIST: dict(anilist_future.result())
+        }
+
+    new_items: List[MediaItem] = []
+    new_links: List[Tuple[ListService, str, MangadexItem]] = []
+    for mangadex_item in page:
 
         for service in [ListService.ANILIST, ListService.MYANIMELIST]:
 
             service_id = mangadex_item.external_ids.get(service)
-            existing = existing_items[service].get(service_id)
 
             if service_id is None:
                 continue
-            if existing is not None:
-                __add_id_mappings(existing, mangadex_item)
+            if service_id in existing_ids[service]:
+                __add_id_mappings(
+                    service, service_id, mangadex_item, mappings
+                )
                 continue
 
-            data: Optional[AnimeListItem] = None
-            if service == ListService.ANILIST:
-                data = load_anilist_info(
-                    int(service_id), MediaType.MANGA
-                )
-            elif service == ListService.MYANIMELIST:
-                data = load_myanimelist_item(
-                    int(service_id), MediaType.MANGA
-                )
+            data = enrichment[service].get(int(service_id))
             if data is not None:
                 anime_item = anime_list_item_to_media_item(data)
-                title = anime_item.title
-                app.logger.debug(f"Upserting {service.value} item {title}")
-                anime_item = db.session.merge(anime_item)
-                existing_items[service][service_id] = anime_item
-                __add_id_mappings(anime_item, mangadex_item)
-        db.session.commit()
+                app.logger.debug(f"Upserting {service.value} item "
+                                 f"{anime_item.title}")
+                new_items.append(anime_item)
+                new_links.append((service, service_id, mangadex_item))
+                existing_ids[service].add(service_id)
 
-    app.logger.info(f"Finished Mangadex Update in "
-                    f"{time.time() - start_time}s.")
+    bulk_upsert(MediaItem, new_items)
+    for service, service_id, mangadex_item in new_links:
+        __add_id_mappings(service, service_id, mangadex_item, mappings)
+    __write_id_mappings(mappings, existing_mappings)
+    db.session.commit()
 
 
-def __add_id_mappings(media_item: MediaItem, mangadex_item: MangadexItem):
+def __add_id_mappings(
+        parent_service: ListService,
+        parent_service_id: str,
+        mangadex_item: MangadexItem,
+        mappings: Dict[MappingKey, str]
+):
     """
-    Adds ID mappings to a media item
-    :param media_item: The media item for which to add the mapping
+    Adds ID mappings to a manga media item
+    :param parent_service: The service of the media item for which to add
+                           the mapping
+    :param parent_service_id: The ID of the media item for which to add
+                              the mapping
     :param mangadex_item: The mangadex ID containing the mapping information
+    :param mappings: The mappings to write, to which the mappings are added
     :return: None
     """
     ids = mangadex_item.external_ids
     ids[ListService.MANGADEX] = mangadex_item.mangadex_id
 
     for service, _id in ids.items():
-        if service == media_item.service:
-            continue
+        if service != parent_service:
+            mappings[(parent_service, parent_service_id, service)] = _id
 
-        mapping = MediaIdMapping(
-            parent_service=media_item.service,
-            parent_service_id=media_item.service_id,
-            media_type=media_item.media_type,
+
+def __write_id_mappings(
+        mappings: Dict[MappingKey, str],
+        existing_mappings: Dict[MappingKey, str]
+):
+    """
+    Writes the ID mappings that are new or changed
+    :param mappings: The ID mappings to write
+    :param existing_mappings: The ID mappings that already exist in the
+                              database. Will be updated with the written
+                              mappings
+    :return: None
+    """
+    changed = {
+        key: service_id
+        for key, service_id in mappings.items()
+        if existing_mappings.get(key) != service_id
+    }
+    for (parent_service, parent_service_id, service), service_id \
+            in changed.items():
+        app.logger.debug(f"Upserting ID mapping "
+                         f"{parent_service.value}:{parent_service_id} "
+                         f"-> {service.value}:{service_id}")
+
+    bulk_upsert(MediaIdMapping, [
+        MediaIdMapping(
+            parent_service=parent_service,
+            parent_service_id=parent_service_id,
+            media_type=MediaType.MANGA,
             service=service,
-            service_id=_id
+            service_id=service_id
         )
-        app.logger.debug(f"Upserting ID mapping "
-                         f"{media_item.service.value}:{media_item.service_id} "
-                         f"-> {service.value}:{_id}")
-        db.session.merge(mapping)
+        for (parent_service, parent_service_id, service), service_id
+        in changed.items()
+    ])
+    existing_mappings.update(changed)
@@ -0,0 +1,101 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+from jerrycan.base import app, db
+from otaku_info.db.MediaItem import MediaItem
+from otaku_info.db.MediaIdMapping import MediaIdMapping
+from otaku_info.db.MangaChapterGuess import MangaChapterGuess
+from otaku_info.enums import ListService, MediaType
+from otaku_info.external.mangadex import fetch_latest_mangadex_chapters
+from otaku_info.utils.watermarks import load_watermark, store_watermark
+
+CHAPTER_FEED_WATERMARK = "mangadex_chapter_feed"
+"""
+Watermark that stores the publishing date of the newest chapter that was
+read from the mangadex chapter feed
+"""
+
+
+def update_mangadex_chapters(batch_size: int = 500):
+    """
+    Reads the chapters that were published on mangadex since the last run
+    and updates the latest chapter of the affected mangadex items as well as
+    the chapter guesses of the anilist items they are linked to.
+    :param batch_size: The maximum amount of IDs per query
+    :return: None
+    """
+    start = time.time()
+    since = load_watermark(CHAPTER_FEED_WATERMARK)
+    if since is None:
+        since = (datetime.utcnow() - timedelta(days=1))\
+            .strftime("%Y-%m-%dT%H:%M:%S")
+    app.logger.info(f"Starting Mangadex chapter feed update (since {since})")
+
+    latest, newest = fetch_latest_mangadex_chapters(since)
+    mangadex_ids = list(latest)
+
+    anilist_latest: Dict[str, int] = {}
+    updated = 0
+    for i in range(0, len(mangadex_ids), batch_size):
+        batch = mangadex_ids[i:i + batch_size]
+
+        items: List[MediaItem] = MediaItem.query.filter(
+            MediaItem.service == ListService.MANGADEX,
+            MediaItem.media_type == MediaType.MANGA,
+            MediaItem.service_id.in_(batch)  # type: ignore
+        ).all()
+        for item in items:
+            chapter = latest[item.service_id]
+            if item.latest_release is None or chapter > item.latest_release:
+                item.latest_release = chapter
+                updated += 1
+
+        for anilist_id, mangadex_id in db.session.query(
+                MediaIdMapping.parent_service_id, MediaIdMapping.service_id
+        ).filter(
+            MediaIdMapping.parent_service == ListService.ANILIST,
+            MediaIdMapping.media_type == MediaType.MANGA,
+            MediaIdMapping.service == ListService.MANGADEX,
+            MediaIdMapping.service_id.in_(batch)  # type: ignore
+        ):
+            anilist_latest[anilist_id] = max(
+                anilist_latest.get(anilist_id, 0), latest[mangadex_id]
+            )
+
+    anilist_ids = list(anilist_latest)
+    for i in range(0, len(anilist_ids), batch_size):
+        guesses: List[MangaChapterGuess] = MangaChapterGuess.query.filter(
+            MangaChapterGuess.service == ListService.ANILIST,
+            MangaChapterGuess.media_type == MediaType.MANGA,
+            MangaChapterGuess.service_id.in_(  # type: ignore
+                anilist_ids[i:i + batch_size]
+            )
+        ).options(db.joinedload(MangaChapterGuess.media_item)).all()
+        for guess in guesses:
+            guess.add_release(anilist_latest[guess.service_id])
+
+    db.session.commit()
+    store_watermark(CHAPTER_FEED_WATERMARK, newest)
+
+    app.logger.info(f"Finished Mangadex chapter feed update in "
+                    f"{time.time() - start}s ({len(latest)} series, "
+                    f"{updated} mangadex items updated).")
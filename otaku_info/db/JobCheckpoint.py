@@ -0,0 +1,42 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+from jerrycan.base import db
+from jerrycan.db.ModelMixin import ModelMixin
+
+
+class JobCheckpoint(ModelMixin, db.Model):
+    """
+    Database model that stores the progress of a long-running background job
+    that was interrupted, so that the job can be resumed on its next run.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes the Model
+        :param args: The constructor arguments
+        :param kwargs: The constructor keyword arguments
+        """
+        super().__init__(*args, **kwargs)
+
+    __tablename__ = "job_checkpoints"
+
+    job: str = db.Column(db.String(64), primary_key=True)
+    cursor: str = db.Column(db.Text, nullable=False)
+    started_at: int = db.Column(db.Integer, nullable=False)
+    last_update: int = db.Column(db.Integer, nullable=False)
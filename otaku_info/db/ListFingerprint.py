@@ -0,0 +1,61 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from jerrycan.base import db
+from jerrycan.db.ModelMixin import ModelMixin
+from otaku_info.db.ServiceUsername import ServiceUsername
+from otaku_info.enums import ListService, MediaType
+
+
+class ListFingerprint(ModelMixin, db.Model):
+    """
+    Database model that stores a fingerprint of the contents of a user's
+    list on an external service.
+    Used to skip updating lists that did not change since the last update.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes the Model
+        :param args: The constructor arguments
+        :param kwargs: The constructor keyword arguments
+        """
+        super().__init__(*args, **kwargs)
+
+    __tablename__ = "list_fingerprints"
+    __table_args__ = (db.ForeignKeyConstraint(
+        ("user_id", "service"),
+        (ServiceUsername.user_id, ServiceUsername.service),
+        ondelete="CASCADE",
+        onupdate="CASCADE"
+    ),)
+
+    user_id: int = db.Column(db.Integer, primary_key=True)
+    service: ListService = db.Column(db.Enum(ListService), primary_key=True)
+    media_type: MediaType = db.Column(db.Enum(MediaType), primary_key=True)
+
+    fingerprint: str = db.Column(db.String(64), nullable=False)
+    last_update: int = db.Column(db.Integer, nullable=False, default=0)
+
+    service_username: ServiceUsername = db.relationship(
+        "ServiceUsername",
+        backref=db.backref(
+            "list_fingerprints", lazy=True, cascade="all,delete"
+        )
+    )
@@ -17,10 +17,40 @@ You should have received a copy of the GNU General Public License
 along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
+import time
+from statistics import median
+from typing import Optional, List, Tuple
 from jerrycan.base import db
 from jerrycan.db.ModelMixin import ModelMixin
 from otaku_info.db.MediaItem import MediaItem
-from otaku_info.enums import MediaType, ListService
+from otaku_info.enums import MediaType, ListService, ReleasingState
+
+MIN_UPDATE_INTERVAL = 60 * 60
+"""
+The minimum amount of seconds between two updates of a guess
+"""
+
+MAX_UPDATE_INTERVAL = 60 * 60 * 24 * 7
+"""
+The maximum amount of seconds between two updates of a guess
+"""
+
+SAMPLE_WINDOW = 50
+"""
+The amount of progress samples on which a guess is based
+"""
+
+RELEASE_WINDOW = 6
+"""
+The amount of detected releases on which the release period is estimated
+"""
+
+RELEASE_PERIOD_FRACTION = 8
+"""
+The update interval never exceeds this fraction of the release period.
+Updates are done as often as possible starting at this fraction of the
+release period before the next release is expected
+"""
 
 
 class MangaChapterGuess(ModelMixin, db.Model):
@@ -46,9 +76,147 @@ class MangaChapterGuess(ModelMixin, db.Model):
     service_id: str = db.Column(db.String(255), primary_key=True)
     media_type: MediaType = db.Column(db.Enum(MediaType), primary_key=True)
 
-    guess: int = db.Column(db.Integer, nullable=True)
+    guess: Optional[int] = db.Column(db.Integer, nullable=True)
     last_update: int = db.Column(db.Integer, nullable=False, default=0)
+    last_change: int = db.Column(db.Integer, nullable=False, default=0)
+    update_interval: int = db.Column(
+        db.Integer, nullable=False, default=MIN_UPDATE_INTERVAL
+    )
+    next_update: int = \
+        db.Column(db.Integer, nullable=False, default=0, index=True)
+    last_activity_id: int = db.Column(db.Integer, nullable=False, default=0)
+    progress_samples: str = db.Column(db.Text, nullable=False, default="")
+    released_chapter: Optional[int] = db.Column(db.Integer, nullable=True)
+    release_history: str = db.Column(db.Text, nullable=False, default="")
 
     media_item: MediaItem = db.relationship(
         "MediaItem", back_populates="chapter_guess"
     )
+
+    @property
+    def samples(self) -> List[int]:
+        """
+        :return: The stored progress samples, newest first
+        """
+        if not self.progress_samples:
+            return []
+        return [int(x) for x in self.progress_samples.split(",")]
+
+    @property
+    def release_times(self) -> List[int]:
+        """
+        :return: The times at which increases of the guess were detected,
+                 newest first
+        """
+        if not self.release_history:
+            return []
+        return [int(x) for x in self.release_history.split(",")]
+
+    @property
+    def release_period(self) -> Optional[int]:
+        """
+        :return: The estimated amount of seconds between two releases,
+                 the median of the time between the recently detected
+                 releases. None if less than two releases were detected
+        """
+        times = self.release_times
+        gaps = [newer - older for newer, older in zip(times, times[1:])]
+        if len(gaps) == 0:
+            return None
+        return int(median(gaps))
+
+    def add_samples(self, samples: List[Tuple[int, int]]):
+        """
+        Adds new progress samples and updates the guess accordingly.
+        The guess is the most common progress among the newest samples,
+        ties are resolved in favour of the newer sample.
+        The guess is never lower than a chapter known to have been released.
+        :param samples: The new activity IDs and progresses, newest first.
+                        Samples that are not newer than the newest
+                        previously added sample are ignored.
+        :return: None
+        """
+        new_samples = [
+            progress for activity_id, progress in samples
+            if activity_id > self.last_activity_id
+        ]
+        if len(new_samples) > 0:
+            self.last_activity_id = max(x for x, _ in samples)
+
+        progresses = (new_samples + self.samples)[0:SAMPLE_WINDOW]
+        self.progress_samples = ",".join(str(x) for x in progresses)
+
+        guess = self.guess
+        if len(progresses) > 0:
+            guess = max(progresses, key=progresses.count)
+        if self.released_chapter is not None:
+            guess = max(guess or 0, self.released_chapter)
+        self.update_guess(guess)
+
+    def add_release(self, chapter: int):
+        """
+        Raises the guess to a chapter that is known to have been released.
+        Since the guess is then kept up to date by the release feed, the next
+        activity-based update is pushed back as far as possible.
+        :param chapter: The released chapter
+        :return: None
+        """
+        if self.released_chapter is None or chapter > self.released_chapter:
+            self.released_chapter = chapter
+        if self.guess is None or chapter > self.guess:
+            self.update_guess(chapter)
+            self.update_interval = MAX_UPDATE_INTERVAL
+            self.next_update = self.last_update + MAX_UPDATE_INTERVAL
+
+    def update_guess(self, guess: Optional[int]):
+        """
+        Updates the guess and schedules its next update.
+        Increases of the guess are recorded as releases, which are used to
+        estimate the release period of the series.
+        After a change, the guess is updated again as soon as possible.
+        While the guess stays the same, the update interval grows, but never
+        beyond a fraction of the release period, or of the maximum update
+        interval as long as the release period is unknown.
+        Starting at this fraction of the release period before the next
+        release is expected, the guess is updated as soon as possible again
+        until the release is detected or it is overdue by an entire release
+        period.
+        Finished or cancelled series are updated as rarely as possible.
+        :param guess: The new guess
+        :return: None
+        """
+        now = int(time.time())
+
+        if guess != self.guess:
+            if guess is not None and self.guess is not None \
+                    and guess > self.guess:
+                releases = ([now] + self.release_times)[0:RELEASE_WINDOW]
+                self.release_history = ",".join(str(x) for x in releases)
+            self.last_change = now
+            interval = MIN_UPDATE_INTERVAL
+        else:
+            interval = int((self.update_interval or MIN_UPDATE_INTERVAL) * 1.5)
+
+        period = self.release_period
+        if period is None:
+            interval = min(
+                interval, MAX_UPDATE_INTERVAL // RELEASE_PERIOD_FRACTION
+            )
+        else:
+            margin = period // RELEASE_PERIOD_FRACTION
+            expected = self.release_times[0] + period
+            interval = min(interval, margin)
+            if expected - margin <= now < expected + period:
+                interval = MIN_UPDATE_INTERVAL
+            elif now < expected - margin:
+                interval = min(interval, expected - margin - now)
+
+        if self.media_item is not None and self.media_item.releasing_state \
+                in [ReleasingState.FINISHED, ReleasingState.CANCELLED]:
+            interval = MAX_UPDATE_INTERVAL
+
+        self.guess = guess
+        self.last_update = now
+        self.update_interval = \
+            min(MAX_UPDATE_INTERVAL, max(MIN_UPDATE_INTERVAL, interval))
+        self.next_update = now + self.update_interval
@@ -0,0 +1,76 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from jerrycan.base import db
+from jerrycan.db.ModelMixin import ModelMixin
+from otaku_info.db.ServiceUsername import ServiceUsername
+from otaku_info.enums import ListService
+
+URGENT_PRIORITY = 0
+"""
+Priority for users whose lists should be synced as soon as possible
+"""
+
+DEFAULT_PRIORITY = 1
+"""
+Priority for regularly scheduled list syncs
+"""
+
+
+class SyncQueueEntry(ModelMixin, db.Model):
+    """
+    Database model that schedules the syncing of a user's list
+    on an external service.
+    Entries are processed in order of their priority and due time.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes the Model
+        :param args: The constructor arguments
+        :param kwargs: The constructor keyword arguments
+        """
+        super().__init__(*args, **kwargs)
+
+    __tablename__ = "sync_queue"
+    __table_args__ = (
+        db.ForeignKeyConstraint(
+            ("user_id", "service"),
+            (ServiceUsername.user_id, ServiceUsername.service),
+            ondelete="CASCADE",
+            onupdate="CASCADE"
+        ),
+        db.Index("sync_queue_order", "service", "priority", "next_sync")
+    )
+
+    user_id: int = db.Column(db.Integer, primary_key=True)
+    service: ListService = db.Column(db.Enum(ListService), primary_key=True)
+
+    priority: int = \
+        db.Column(db.Integer, nullable=False, default=DEFAULT_PRIORITY)
+    next_sync: int = db.Column(db.Integer, nullable=False, default=0)
+    last_sync: int = db.Column(db.Integer, nullable=False, default=0)
+    last_activity: int = db.Column(db.Integer, nullable=False, default=0)
+
+    service_username: ServiceUsername = db.relationship(
+        "ServiceUsername",
+        backref=db.backref(
+            "sync_queue_entry", lazy=True, uselist=False, cascade="all,delete"
+        )
+    )
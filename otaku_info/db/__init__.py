@@ -29,6 +29,10 @@ from otaku_info.db.MediaNotification import MediaNotification
 from otaku_info.db.ServiceUsername import ServiceUsername
 from otaku_info.db.NotificationSetting import NotificationSetting
 from otaku_info.db.LnRelease import LnRelease
+from otaku_info.db.ListFingerprint import ListFingerprint
+from otaku_info.db.SyncQueueEntry import SyncQueueEntry
+from otaku_info.db.SyncWatermark import SyncWatermark
+from otaku_info.db.JobCheckpoint import JobCheckpoint
 
 models: List[db.Model] = [
     MangaChapterGuess,
@@ -40,7 +44,11 @@ models: List[db.Model] = [
     ServiceUsername,
     MediaNotification,
     NotificationSetting,
-    LnRelease
+    LnRelease,
+    ListFingerprint,
+    SyncQueueEntry,
+    SyncWatermark,
+    JobCheckpoint
 ]
 """
 The database models of the application
@@ -17,14 +17,21 @@ You should have received a copy of the GNU General Public License
 along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
-import time
 from requests import ConnectionError
 from requests.exceptions import ChunkedEncodingError
-from typing import Optional, List
-from puffotter.graphql import GraphQlClient
+from typing import Optional, Generator, List, Dict, Any, Tuple
 from otaku_info.enums import MediaType, ListService
 from otaku_info.external.entities.AnilistItem import AnilistItem
 from otaku_info.external.entities.AnilistUserItem import AnilistUserItem
+from otaku_info.utils.graphql import RateLimitedGraphQlClient
+from otaku_info.utils.rate_limiting import RateLimiter
+
+
+anilist_client = RateLimitedGraphQlClient("https://graphql.anilist.co", 90)
+"""
+GraphQL client shared by all anilist requests.
+Anilist allows 90 requests per minute.
+"""
 
 
 MEDIA_QUERY = """
@@ -46,6 +53,21 @@ MEDIA_QUERY = """
       episode
       airingAt
     }
+"""
+
+ACTIVITY_QUERY = """
+    ... on ListActivity {
+        id
+        progress
+        userId
+        status
+        media {
+            chapters
+        }
+    }
+"""
+
+RELATIONS_QUERY = """
     relations {
         edges {
             node {
@@ -58,76 +80,97 @@ MEDIA_QUERY = """
 """
 
 
-def guess_latest_manga_chapter(anilist_id: int) -> Optional[int]:
+def load_manga_progress_samples(
+        high_water_marks: Dict[int, int],
+        batch_size: int = 10
+) -> Dict[int, List[Tuple[int, int]]]:
     """
-    Guesses the latest chapter number based on anilist user activity
-    :param anilist_id: The anilist ID to check
-    :return: The latest chapter number
-    """
-    graphql = GraphQlClient("https://graphql.anilist.co")
-    query = """
-    query ($id: Int) {
-        Page(page: 1) {
-        activities(mediaId: $id, sort: ID_DESC) {
-                ... on ListActivity {
-                    progress
-                    userId
-                    status
-                    media {
-                        chapters
-                    }
-                }
-            }
-        }
-    }
+    Loads the chapter progress reported by recent anilist user activities
+    of multiple manga.
+    Only activities that are newer than a previously seen activity are
+    loaded. The activities of multiple manga are fetched using a single
+    request by using GraphQL aliases.
+    :param high_water_marks: The anilist IDs of the manga to check mapped
+                             to the ID of the newest activity that was
+                             already processed for that manga (0 if none)
+    :param batch_size: The amount of manga to check per request
+    :return: The new activity IDs and chapter progresses, newest first,
+             mapped to the anilist IDs.
+             IDs for which the activities could not be fetched
+             are not included.
     """
-    try:
-        resp = graphql.query(query, {"id": anilist_id})
-    except (ChunkedEncodingError, ConnectionError):
-        return None
-
-    if resp is None:
-        return None
-
-    data = resp["data"]["Page"]["activities"]
-
-    progresses = []
-    for entry in data:
-        progress = entry["progress"]
-        status = entry["status"]
-        chapters = entry["media"]["chapters"]
+    anilist_ids = list(high_water_marks.keys())
+    samples: Dict[int, List[Tuple[int, int]]] = {}
+    for i in range(0, len(anilist_ids), batch_size):
+        batch = anilist_ids[i:i + batch_size]
+        pages = "\n".join([
+            f"media_{anilist_id}: Page(page: 1, perPage: 50) {{"
+            f"activities(mediaId: {int(anilist_id)}, sort: ID_DESC, "
+            f"id_greater: {int(high_water_marks[anilist_id])}) "
+            f"{{{ACTIVITY_QUERY}}}"
+            f"}}"
+            for anilist_id in batch
+        ])
+        try:
+            resp = anilist_client.query(f"query {{{pages}}}", None)
+        except (ChunkedEncodingError, ConnectionError):
+            continue
+        if resp is None:
+            continue
 
-        if status == "completed":
-            progresses.append(chapters)
-        elif progress is not None:
-            progress = entry["progress"].split(" - ")[-1]
-            progresses.append(int(progress))
+        for anilist_id in batch:
+            page = resp["data"].get(f"media_{anilist_id}")
+            if page is None:
+                continue
+            samples[anilist_id] = []
+            for activity in page["activities"]:
+                progress = __progress_from_activity(activity)
+                if progress is not None:
+                    samples[anilist_id].append((activity["id"], progress))
+    return samples
 
-    progresses = progresses[0:20]
-    progresses.sort(key=lambda x: progresses.count(x), reverse=True)
-    progresses = sorted(progresses, key=progresses.count, reverse=True)
-    time.sleep(0.5)
 
-    try:
-        return progresses[0]
-    except IndexError:
+def __progress_from_activity(activity: Dict[str, Any]) -> Optional[int]:
+    """
+    Extracts the chapter progress from an anilist list activity
+    :param activity: The activity
+    :return: The chapter progress, if the activity contains any
+    """
+    if activity.get("status") == "completed":
+        return activity["media"]["chapters"]
+    elif activity.get("progress") is not None:
+        return int(activity["progress"].split(" - ")[-1])
+    else:
         return None
 
 
 def load_anilist(
         username: str,
-        media_type: MediaType
-) -> List[AnilistUserItem]:
+        media_type: MediaType,
+        chunk_size: int = 500,
+        rate_limiter: Optional[RateLimiter] = None
+) -> Generator[AnilistUserItem, None, None]:
     """
-    Loads the anilist for a user
+    Loads the anilist for a user.
+    The list is loaded in chunks to avoid huge responses for large lists,
+    each chunk is yielded as soon as it was loaded.
+    If a chunk can't be loaded, a ConnectionError is raised, so that an
+    incomplete list can't be mistaken for a complete one.
+    Relations are not loaded for list entries.
     :param username: The username
     :param media_type: The media type, either MANGA or ANIME
-    :return: The anilist list items for the user and media type
+    :param chunk_size: The amount of entries per chunk (at most 500)
+    :param rate_limiter: An additional rate limiter that is waited for
+                         before each chunk is requested
+    :return: A generator of the anilist list items for the user and
+             media type
     """
-    graphql = GraphQlClient("https://graphql.anilist.co")
     query = """
-    query ($username: String, $media_type: MediaType) {
-        MediaListCollection(userName: $username, type: $media_type) {
+    query ($username: String, $media_type: MediaType,
+           $chunk: Int, $per_chunk: Int) {
+        MediaListCollection(userName: $username, type: $media_type,
+                            chunk: $chunk, perChunk: $per_chunk) {
+            hasNextChunk
             lists {
                 name
                 entries {
@@ -142,26 +185,32 @@ def load_anilist(
     }
     """.replace("@{MEDIA_QUERY}", MEDIA_QUERY)
 
-    try:
-        resp = graphql.query(query, {
-            "username": username,
-            "media_type": media_type.value.upper()
-        })
-    except (ChunkedEncodingError, ConnectionError):
-        return []
-    if resp is None:
-        return []
-    user_lists = resp["data"]["MediaListCollection"]["lists"]
+    chunk = 1
+    while True:
+        if rate_limiter is not None:
+            rate_limiter.wait()
+        try:
+            resp = anilist_client.query(query, {
+                "username": username,
+                "media_type": media_type.value.upper(),
+                "chunk": chunk,
+                "per_chunk": chunk_size
+            })
+        except (ChunkedEncodingError, ConnectionError):
+            resp = None
+        if resp is None:
+            raise ConnectionError(f"Failed to load chunk {chunk} of anilist "
+                                  f"{media_type.value} list for {username}")
 
-    anilist_items: List[AnilistUserItem] = []
-    for entries, list_name in [
-        (y["entries"], y["name"]) for y in user_lists
-    ]:
-        for entry in entries:
-            entry["list_name"] = list_name
-            anilist_items.append(AnilistUserItem.from_query(media_type, entry))
+        collection = resp["data"]["MediaListCollection"]
+        for user_list in collection["lists"]:
+            for entry in user_list["entries"]:
+                entry["list_name"] = user_list["name"]
+                yield AnilistUserItem.from_query(media_type, entry)
 
-    return anilist_items
+        if not collection["hasNextChunk"]:
+            return
+        chunk += 1
 
 
 def load_anilist_info(
@@ -177,14 +226,15 @@ def load_anilist_info(
                     (either anilist or myanimelist)
     :return: The fetched AnilistItem
     """
-    graphql = GraphQlClient("https://graphql.anilist.co")
     query = """
         query ($id: Int, $media_type: MediaType) {
             Media(@{ID}: $id, type: $media_type) {
                 @{MEDIA_QUERY}
+                @{RELATIONS_QUERY}
             }
         }
-    """.replace("@{MEDIA_QUERY}", MEDIA_QUERY)
+    """.replace("@{MEDIA_QUERY}", MEDIA_QUERY)\
+        .replace("@{RELATIONS_QUERY}", RELATIONS_QUERY)
     if service == ListService.ANILIST:
         query = query.replace("@{ID}", "id")
     elif service == ListService.MYANIMELIST:
@@ -193,7 +243,7 @@ def load_anilist_info(
         return None
 
     try:
-        resp = graphql.query(
+        resp = anilist_client.query(
             query,
             {"id": service_id, "media_type": media_type.value.upper()}
         )
@@ -204,3 +254,59 @@ def load_anilist_info(
         return None
     else:
         return AnilistItem.from_query(media_type, resp["data"]["Media"])
+
+
+def load_anilist_info_batch(
+        service_ids: List[int],
+        media_type: MediaType,
+        service: ListService = ListService.ANILIST,
+        batch_size: int = 50
+) -> Dict[int, AnilistItem]:
+    """
+    Loads information for multiple anilist media items.
+    Up to 50 items are loaded per request.
+    :param service_ids: The anilist or myanimelist media IDs
+    :param media_type: The media type
+    :param service: The service the IDs belong to
+                    (either anilist or myanimelist)
+    :param batch_size: The amount of items to load per request (at most 50)
+    :return: The fetched AnilistItems, mapped to the IDs used to load them.
+             IDs for which no item could be loaded are not included.
+    """
+    query = """
+        query ($ids: [Int], $media_type: MediaType, $per_page: Int) {
+            Page(page: 1, perPage: $per_page) {
+                media(@{ID}: $ids, type: $media_type) {
+                    @{MEDIA_QUERY}
+                    @{RELATIONS_QUERY}
+                }
+            }
+        }
+    """.replace("@{MEDIA_QUERY}", MEDIA_QUERY)\
+        .replace("@{RELATIONS_QUERY}", RELATIONS_QUERY)
+    if service == ListService.ANILIST:
+        query, id_key = query.replace("@{ID}", "id_in"), "id"
+    elif service == ListService.MYANIMELIST:
+        query, id_key = query.replace("@{ID}", "idMal_in"), "idMal"
+    else:
+        return {}
+
+    unique_ids = list(dict.fromkeys(service_ids))
+    items: Dict[int, AnilistItem] = {}
+    for i in range(0, len(unique_ids), batch_size):
+        batch = unique_ids[i:i + batch_size]
+        try:
+            resp = anilist_client.query(query, {
+                "ids": batch,
+                "media_type": media_type.value.upper(),
+                "per_page": len(batch)
+            })
+        except (ChunkedEncodingError, ConnectionError):
+            continue
+        if resp is None:
+            continue
+
+        for entry in resp["data"]["Page"]["media"]:
+            items[entry[id_key]] = AnilistItem.from_query(media_type, entry)
+
+    return items
@@ -29,16 +29,20 @@ class AnilistItem(AnimeListItem):
     Represents the information fetched using anilist's API
     """
 
-    @property
-    def myanimelist_id(self) -> Optional[int]:
+    __slots__ = ("myanimelist_id",)
+
+    def __init__(self, *args, **kwargs):
         """
-        :return: The myanimelist ID
+        Initializes the AnilistItem object
+        :param args: The constructor arguments
+        :param kwargs: The constructor keyword arguments
         """
+        super().__init__(*args, **kwargs)
+
+        # The myanimelist ID
         mal_id = self.extra_ids.get(ListService.MYANIMELIST)
-        if mal_id is not None and mal_id.isdigit():
-            return int(mal_id)
-        else:
-            return None
+        self.myanimelist_id: Optional[int] = \
+            int(mal_id) if mal_id is not None and mal_id.isdigit() else None
 
     @classmethod
     def from_query(cls, media_type: MediaType, data: Dict[str, Any]) \
@@ -60,7 +64,8 @@ class AnilistItem(AnimeListItem):
         releasing_state = ReleasingState(_releasing_state.lower())
 
         relations = {}
-        for edge in data["relations"]["edges"]:
+        edges = data.get("relations", {"edges": []})["edges"]
+        for edge in edges:
             node_id = edge["node"]["id"]
             node_type = MediaType(edge["node"]["type"].lower())
             relation_type = MediaRelationType(edge["relationType"].lower())
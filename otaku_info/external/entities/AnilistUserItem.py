@@ -28,6 +28,15 @@ class AnilistUserItem(AnilistItem):
     Class that models an anilist list item for a user
     Represents the information fetched using anilist's API
     """
+
+    __slots__ = (
+        "score",
+        "progress",
+        "volume_progress",
+        "consuming_state",
+        "list_name"
+    )
+
     def __init__(
             self,
             _id: int,
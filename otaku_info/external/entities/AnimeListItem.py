@@ -26,6 +26,26 @@ class AnimeListItem:
     """
     Class that models a general anime list item
     """
+
+    __slots__ = (
+        "id",
+        "service",
+        "extra_ids",
+        "media_type",
+        "media_subtype",
+        "english_title",
+        "romaji_title",
+        "cover_url",
+        "chapters",
+        "volumes",
+        "episodes",
+        "next_episode",
+        "next_episode_airing_time",
+        "releasing_state",
+        "relations",
+        "latest_release"
+    )
+
     def __init__(
             self,
             _id: int,
@@ -78,15 +98,19 @@ class AnimeListItem:
         self.releasing_state = releasing_state
         self.relations = relations
 
-    @property
-    def latest_release(self) -> Optional[int]:
+        # The latest release. Chapters for manga, episodes for anime
+        self.latest_release: Optional[int] = \
+            episodes if media_type == MediaType.ANIME else chapters
+
+    def fields(self) -> Dict[str, Any]:
         """
-        :return: The latest release. Chapters for manga, episodes for anime
+        :return: The values of all of the item's attributes
         """
-        if self.media_type == MediaType.ANIME:
-            return self.episodes
-        else:
-            return self.chapters
+        return {
+            name: getattr(self, name)
+            for cls in type(self).__mro__
+            for name in getattr(cls, "__slots__", ())
+        }
 
     @classmethod
     def from_query(cls, media_type: MediaType, data: Dict[str, Any]) \
@@ -28,6 +28,29 @@ class MangadexItem:
     Class that models a general anilist list item
     Represents the information fetched using anilist's API
     """
+
+    __slots__ = (
+        "mangadex_id",
+        "external_ids",
+        "english_title",
+        "romaji_title",
+        "cover_url",
+        "total_chapters",
+        "latest_chapter",
+        "releasing_state",
+        "updated_at"
+    )
+
+    RELEASING_STATES: Dict[str, ReleasingState] = {
+        "ongoing": ReleasingState.RELEASING,
+        "completed": ReleasingState.FINISHED,
+        "cancelled": ReleasingState.CANCELLED,
+        "hiatus": ReleasingState.UNKNOWN
+    }
+    """
+    Maps mangadex status tags to releasing states
+    """
+
     def __init__(
             self,
             mangadex_id: str,
@@ -37,7 +60,8 @@ class MangadexItem:
             cover_url: str,
             total_chapters: Optional[int],
             latest_chapter: Optional[int],
-            releasing_state: ReleasingState
+            releasing_state: ReleasingState,
+            updated_at: Optional[str] = None
     ):
         """
         Initializes the MangadexItem object
@@ -49,6 +73,8 @@ class MangadexItem:
         :param total_chapters: The total amount of chapters
         :param latest_chapter: The latest chapter
         :param releasing_state: The releasing state
+        :param updated_at: When the item was last updated on mangadex
+                           (Format: YYYY-MM-DDTHH:MM:SS)
         """
         self.mangadex_id = mangadex_id
         self.external_ids = external_ids
@@ -58,6 +84,7 @@ class MangadexItem:
         self.total_chapters = total_chapters
         self.latest_chapter = latest_chapter
         self.releasing_state = releasing_state
+        self.updated_at = updated_at
 
     @classmethod
     def from_json(cls, data: Dict[str, Any]) \
@@ -118,7 +145,8 @@ class MangadexItem:
             relations.get("cover_art", ""),
             total_chapters,
             total_chapters,
-            releasing_state
+            releasing_state,
+            data["attributes"]["updatedAt"][0:19]
         )
 
     @staticmethod
@@ -128,9 +156,4 @@ class MangadexItem:
         :param state: The status tag to translate
         :return: The releasing state
         """
-        return {
-            "ongoing": ReleasingState.RELEASING,
-            "completed": ReleasingState.FINISHED,
-            "cancelled": ReleasingState.CANCELLED,
-            "hiatus": ReleasingState.UNKNOWN
-        }[state]
+        return MangadexItem.RELEASING_STATES[state]
@@ -29,6 +29,40 @@ class MyanimelistItem(AnimeListItem):
     Represents the information fetched using myanimelist's jikan API
     """
 
+    __slots__ = ()
+
+    RELATION_TYPES: Dict[str, MediaRelationType] = {
+        **{x.value.lower().replace("_", " "): x for x in MediaRelationType},
+        "parent story": MediaRelationType.PARENT,
+        "alternative setting": MediaRelationType.ALTERNATIVE,
+        "alternative version": MediaRelationType.ALTERNATIVE,
+        "spin-off": MediaRelationType.SPIN_OFF
+    }
+    """
+    Maps myanimelist relation types to media relation types
+    """
+
+    RELEASING_STATES: Dict[str, ReleasingState] = {
+        **{x.value.lower().replace("_", " "): x for x in ReleasingState},
+        "finished airing": ReleasingState.FINISHED,
+        "publishing": ReleasingState.RELEASING,
+        "airing": ReleasingState.RELEASING,
+        "discontinued": ReleasingState.CANCELLED,
+        "on hiatus": ReleasingState.UNKNOWN
+    }
+    """
+    Maps myanimelist releasing states to releasing states
+    """
+
+    MEDIA_SUBTYPES: Dict[str, MediaSubType] = {
+        **{x.value.lower().replace("_", " "): x for x in MediaSubType},
+        "one-shot": MediaSubType.ONE_SHOT,
+        "light novel": MediaSubType.NOVEL
+    }
+    """
+    Maps myanimelist media subtypes to media subtypes
+    """
+
     @classmethod
     def from_query(cls, media_type: MediaType, data: Dict[str, Any]) \
             -> "MyanimelistItem":
@@ -75,17 +109,9 @@ class MyanimelistItem(AnimeListItem):
         :param relation_string: The string to resolve
         :return: The resolved MediaRelationType
         """
-        base = {
-            x.value.lower().replace("_", " "): x
-            for x in MediaRelationType
-        }
-        base.update({
-            "parent story": MediaRelationType.PARENT,
-            "alternative setting": MediaRelationType.ALTERNATIVE,
-            "alternative version": MediaRelationType.ALTERNATIVE,
-            "spin-off": MediaRelationType.SPIN_OFF
-        })
-        relation = base.get(relation_string.lower())
+        relation = MyanimelistItem.RELATION_TYPES.get(
+            relation_string.lower()
+        )
         if relation is None:
             logging.error(
                 f"Missing MAL mapping: 'relation_type:{relation_string}'"
@@ -101,18 +127,9 @@ class MyanimelistItem(AnimeListItem):
         :param releasing_string: The string to resolve
         :return: The resolved ReleasingState
         """
-        base = {
-            x.value.lower().replace("_", " "): x
-            for x in ReleasingState
-        }
-        base.update({
-            "finished airing": ReleasingState.FINISHED,
-            "publishing": ReleasingState.RELEASING,
-            "airing": ReleasingState.RELEASING,
-            "discontinued": ReleasingState.CANCELLED,
-            "on hiatus": ReleasingState.UNKNOWN
-        })
-        state = base.get(releasing_string.lower())
+        state = MyanimelistItem.RELEASING_STATES.get(
+            releasing_string.lower()
+        )
         if state is None:
             logging.error(
                 f"Missing MAL mapping: 'releasing_state:{releasing_string}'"
@@ -128,15 +145,7 @@ class MyanimelistItem(AnimeListItem):
         :param subtype_string: The string to resolve
         :return: The resolved MediaSubType
         """
-        base = {
-            x.value.lower().replace("_", " "): x
-            for x in MediaSubType
-        }
-        base.update({
-            "one-shot": MediaSubType.ONE_SHOT,
-            "light novel": MediaSubType.NOVEL
-        })
-        subtype = base.get(subtype_string.lower())
+        subtype = MyanimelistItem.MEDIA_SUBTYPES.get(subtype_string.lower())
         if subtype is None:
             logging.error(
                 f"Missing MAL mapping: subtype:'{subtype_string}'"
@@ -18,9 +18,10 @@ along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from bs4.element import Tag
-from otaku_info.utils.dates import map_month_name_to_month_number
+from otaku_info.utils.dates import map_month_name_to_month_number, \
+    map_month_number_to_month_name
 from otaku_info.external.anilist import load_anilist_info
 from otaku_info.enums import ListService, MediaType
 
@@ -30,6 +31,20 @@ class RedditLnRelease:
     Object that acts as a wrapper around a light novel release on reddit.com
     """
 
+    __slots__ = (
+        "series_name",
+        "volume",
+        "publisher",
+        "purchase_link",
+        "info_link",
+        "digital",
+        "physical",
+        "year",
+        "release_date",
+        "release_date_string",
+        "myanimelist_id"
+    )
+
     def __init__(
             self,
             series_name: str,
@@ -62,14 +77,23 @@ class RedditLnRelease:
         self.digital = digital
         self.physical = physical
         self.year = year
-        self._release_date_string = release_date_string
 
-    @property
-    def release_date(self) -> datetime:
+        # The release date as a datetime object and as a string (ISO 8601)
+        self.release_date = self.parse_release_date(year, release_date_string)
+        self.release_date_string = self.release_date.strftime("%Y-%m-%d")
+
+        # The myanimelist ID, if available
+        self.myanimelist_id = self.parse_myanimelist_id(info_link)
+
+    @staticmethod
+    def parse_release_date(year: int, release_date_string: str) -> datetime:
         """
+        Parses the release date of a release
+        :param year: The year of release
+        :param release_date_string: The month and day of release
         :return: The release date as a datetime object
         """
-        month_name, day_string = self._release_date_string.split(" ")
+        month_name, day_string = release_date_string.split(" ")
         month = map_month_name_to_month_number(month_name)
         if month is None:
             month = 1
@@ -77,24 +101,19 @@ class RedditLnRelease:
             day = int(day_string)
         except ValueError:
             day = 1
-        return datetime(year=self.year, month=month, day=day)
-
-    @property
-    def release_date_string(self) -> str:
-        """
-        :return: The release date as a string (ISO 8601)
-        """
-        return self.release_date.strftime("%Y-%m-%d")
+        return datetime(year=year, month=month, day=day)
 
-    @property
-    def myanimelist_id(self) -> Optional[int]:
+    @staticmethod
+    def parse_myanimelist_id(info_link: Optional[str]) -> Optional[int]:
         """
+        Parses the myanimelist ID of a release from its info link
+        :param info_link: Link to information for the release
         :return: The myanimelist ID, if available
         """
-        if self.info_link is None or "myanimelist.net" not in self.info_link:
+        if info_link is None or "myanimelist.net" not in info_link:
             return None
 
-        url_parts = self.info_link.split("/")
+        url_parts = info_link.split("/")
         index = -1
         while not url_parts[index].isdigit():
             index -= 1
@@ -115,6 +134,33 @@ class RedditLnRelease:
         else:
             return None
 
+    def to_json(self) -> Dict[str, Any]:
+        """
+        Converts the release into a JSON-serializable dictionary
+        :return: The dictionary, may be converted back using from_json
+        """
+        month_name = map_month_number_to_month_name(self.release_date.month)
+        return {
+            "series_name": self.series_name,
+            "year": self.year,
+            "release_date_string": f"{month_name} {self.release_date.day}",
+            "volume": self.volume,
+            "publisher": self.publisher,
+            "purchase_link": self.purchase_link,
+            "info_link": self.info_link,
+            "digital": self.digital,
+            "physical": self.physical
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "RedditLnRelease":
+        """
+        Generates a reddit LN release from a dictionary generated by to_json
+        :param data: The data to use
+        :return: The reddit ln release
+        """
+        return cls(**data)
+
     @classmethod
     def from_parts(cls, year: int, parts: List[Tag]) -> "RedditLnRelease":
         """
@@ -133,8 +179,9 @@ class RedditLnRelease:
         if info_link_item is not None:
             info_link = info_link_item["href"]
 
-        digital = "digital" in parts[4].text.lower()
-        physical = "physical" in parts[4].text.lower()
+        release_format = parts[4].text.lower()
+        digital = "digital" in release_format
+        physical = "physical" in release_format
 
         return cls(
             series_name=parts[1].text,
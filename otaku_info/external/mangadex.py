@@ -21,58 +21,218 @@ import json
 import time
 import requests
 from jerrycan.base import app
-from typing import Optional, List, Dict, Any, Union
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, List, Dict, Any, Union, Set, Iterator, \
+    Generator, Tuple
 from otaku_info.external.entities.MangadexItem import MangadexItem
+from otaku_info.utils.rate_limiting import RateLimiter
 
+mangadex_rate_limiter = RateLimiter(120)
+"""
+Rate limiter shared by all requests to the mangadex API
+"""
 
-def fetch_all_mangadex_items() -> List[MangadexItem]:
+
+def mangadex_request(url: str, params: Dict[str, Any]) -> requests.Response:
     """
-    Fetches all available mangadex items
-    :return: The mangadex items
+    Sends a GET request to the mangadex API while staying within the
+    shared rate budget
+    :param url: The URL to request
+    :param params: The query parameters
+    :return: The response
     """
-    url = "https://api.mangadex.org/manga"
-    items: List[Dict[str, Any]] = []
-    mangadex_items: List[MangadexItem] = []
-    page = 0
-    last_date = "1970-01-01T00:00:00"
-
-    while True:
-        params: Dict[str, Union[int, str]] = {
-            "createdAtSince": last_date,
-            "order[createdAt]": "asc",
-            "limit": 100,
-            "offset": 100 * page
-        }
-        app.logger.debug(f"Mangadex: {params}")
-        response = requests.get(url, params=params)
-        data = json.loads(response.text)
-        time.sleep(1)
+    mangadex_rate_limiter.wait()
+    response = requests.get(url, params=params)
+    if response.status_code == 429:
+        retry_after = response.headers.get("Retry-After")
+        mangadex_rate_limiter.update(
+            retry_after=60 if retry_after is None else float(retry_after)
+        )
+    return response
+
+
+def iterate_mangadex_pages(paginator: "MangadexPaginator") \
+        -> Generator[Tuple[List[MangadexItem], str], None, None]:
+    """
+    Fetches mangadex items page by page.
+    The covers of each page are resolved while the next page is fetched,
+    so at most two pages are held in memory at once.
+    :param paginator: The paginator that determines which pages to fetch
+    :return: A generator that yields the items of each page including their
+             covers, as well as the paginator cursor that resumes after
+             the page
+    """
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pending: Optional[Tuple[List[MangadexItem], str, Future]] = None
+        for page in paginator:
+            new_items = [MangadexItem.from_json(x) for x in page]
+            future = executor.submit(add_covers, new_items)
+            if pending is not None:
+                pending[2].result()
+                yield pending[0], pending[1]
+            pending = (new_items, paginator.cursor, future)
+
+        if pending is not None:
+            pending[2].result()
+            yield pending[0], pending[1]
+
+    app.logger.info(f"Mangadex: Fetched {paginator.pages_fetched} pages, "
+                    f"suppressed {paginator.duplicates} duplicates")
+
 
-        if data["result"] == "error":
-            # TODO understand what's happening here
-            new_date = items[-1]["attributes"]["createdAt"]
-            new_date = new_date.split("T")[0] + "T00:00:00"
+class MangadexPaginator:
+    """
+    Iterates over the pages of a mangadex list endpoint using keyset
+    pagination.
+    Instead of using offsets, each page is requested starting at the date of
+    the last item of the previous page. Items that share this date and were
+    already returned are remembered by their IDs and skipped.
+    If a page only contains items sharing the date, the following pages are
+    requested using an offset past these items instead. This relies on
+    mangadex returning items that share a date in the same order for
+    each request, which is not guaranteed, so items may be missed if more
+    than a page worth of items share the same date.
+    """
+
+    def __init__(
+            self,
+            date_key: str = "createdAt",
+            since: str = "1970-01-01T00:00:00",
+            seen_ids: Optional[List[str]] = None,
+            page_size: int = 100,
+            retries: int = 3,
+            url: str = "https://api.mangadex.org/manga",
+            params: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Initializes the paginator
+        :param date_key: The date by which to order the items
+                         (For example createdAt or updatedAt)
+        :param since: The date at which to start (Format: YYYY-MM-DDTHH:MM:SS)
+        :param seen_ids: IDs of items with the start date that were already
+                         fetched
+        :param page_size: The amount of items per page
+        :param retries: How often a failed request is retried
+        :param url: The URL of the list endpoint
+        :param params: Additional query parameters, for example filters
+        """
+        self.date_key = date_key
+        self.date = since
+        self.seen_ids: Set[str] = set([] if seen_ids is None else seen_ids)
+        self.page_size = page_size
+        self.retries = retries
+        self.url = url
+        self.params: Dict[str, Any] = {} if params is None else params
+        self.pages_fetched = 0
+        self.duplicates = 0
+        self.complete = False
 
-            if new_date == last_date:
+    @property
+    def cursor(self) -> str:
+        """
+        :return: The current position of the paginator, may be used to resume
+                 the pagination using from_cursor
+        """
+        return self.date + "|" + ",".join(sorted(self.seen_ids))
+
+    @classmethod
+    def from_cursor(cls, cursor: str, date_key: str = "createdAt") \
+            -> "MangadexPaginator":
+        """
+        Creates a paginator that resumes at a cursor
+        :param cursor: The cursor
+        :param date_key: The date by which to order the items
+        :return: The paginator
+        """
+        date, ids = cursor.split("|", 1)
+        return cls(date_key, date, [x for x in ids.split(",") if x])
+
+    def __iter__(self) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Fetches the pages, starting at the current cursor
+        :return: The JSON data of the items on each page
+        """
+        offset = 0
+        while not self.complete:
+            data = self.__fetch_page(offset)
+            if data is None:
+                break
+            elif len(data) == 0:
+                self.complete = True
                 break
+
+            page = []
+            for item in data:
+                if item["id"] in self.seen_ids:
+                    self.duplicates += 1
+                else:
+                    page.append(item)
+            self.__advance(page)
+            if len(data) < self.page_size:
+                # A partial page means that there are no further items
+                self.complete = True
+
+            if len(page) > 0:
+                offset = self.__skipped_items(data)
+                yield page
+            elif offset > 0:
+                self.complete = True
             else:
-                last_date = new_date
-                page = 0
-                continue
-        elif len(data["data"]) == 0:
-            break
+                # More than a page worth of items share the same date
+                offset = len(self.seen_ids)
 
-        items += data["data"]
-        new_items = [
-            MangadexItem.from_json(x)
-            for x in data["data"]
-        ]
-        add_covers(new_items)
-        mangadex_items += new_items
-        page += 1
+    def __fetch_page(self, offset: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Fetches the page starting at the current cursor
+        :param offset: Offset used to skip items that share the cursor's date
+                       in case there are too many of them to fit on a page
+        :return: The JSON data of the items or None if the request failed
+        """
+        params: Dict[str, Any] = {
+            **self.params,
+            f"{self.date_key}Since": self.date,
+            f"order[{self.date_key}]": "asc",
+            "limit": self.page_size,
+            "offset": offset
+        }
+        for attempt in range(self.retries + 1):
+            app.logger.debug(f"Mangadex: {params}")
+            response = mangadex_request(self.url, params)
+            if response.status_code < 300:
+                self.pages_fetched += 1
+                return json.loads(response.text)["data"]
+            app.logger.warning(f"Mangadex request failed "
+                               f"({response.status_code}): {params}")
+            if attempt < self.retries:
+                time.sleep(2 ** attempt)
+        return None
+
+    def __skipped_items(self, data: List[Dict[str, Any]]) -> int:
+        """
+        Determines the offset of the next page.
+        If all items of a page share the cursor's date, requesting the next
+        page without an offset would only return already seen items
+        :param data: The items of the previous page, including duplicates
+        :return: The offset to use for the next page
+        """
+        dates = [x["attributes"][self.date_key][0:19] for x in data]
+        if all(x == self.date for x in dates):
+            return len(self.seen_ids)
+        else:
+            return 0
 
-    mangadex_items.sort(key=lambda x: x.english_title)
-    return mangadex_items
+    def __advance(self, page: List[Dict[str, Any]]):
+        """
+        Moves the cursor past a page of items
+        :param page: The items of the page
+        :return: None
+        """
+        for item in page:
+            date = item["attributes"][self.date_key][0:19]
+            if date != self.date:
+                self.date = date
+                self.seen_ids = set()
+            self.seen_ids.add(item["id"])
 
 
 def fetch_mangadex_item(mangadex_id: str) -> Optional[MangadexItem]:
@@ -80,8 +240,7 @@ def fetch_mangadex_item(mangadex_id: str) -> Optional[MangadexItem]:
     Fetches information for a mangadex
     """
     url = "https://api.mangadex.org/manga"
-    response = requests.get(url, params={"ids[]": mangadex_id})
-    time.sleep(1)
+    response = mangadex_request(url, {"ids[]": mangadex_id})
 
     if response.status_code >= 300:
         return None
@@ -90,6 +249,79 @@ def fetch_mangadex_item(mangadex_id: str) -> Optional[MangadexItem]:
     return MangadexItem.from_json(data)
 
 
+def fetch_latest_mangadex_chapters(
+        published_since: str,
+        language: str = "en"
+) -> Tuple[Dict[str, int], str]:
+    """
+    Reads the global mangadex chapter feed to find the latest chapters
+    that were published since a date
+    :param published_since: The date since which to read the feed
+                            (Format: YYYY-MM-DDTHH:MM:SS)
+    :param language: The translation language of the chapters
+    :return: The highest new chapter numbers mapped to the mangadex IDs of
+             their manga, as well as the newest publishing date in the feed
+    """
+    paginator = MangadexPaginator(
+        "publishAt",
+        published_since,
+        url="https://api.mangadex.org/chapter",
+        params={
+            "translatedLanguage[]": [language],
+            "includeFuturePublishAt": 0
+        }
+    )
+    latest: Dict[str, int] = {}
+    newest = published_since
+
+    for page in paginator:
+        for chapter in page:
+            attributes = chapter["attributes"]
+            newest = max(newest, attributes["publishAt"][0:19])
+            relations = {x["type"]: x["id"] for x in chapter["relationships"]}
+            manga_id = relations.get("manga")
+            try:
+                number = int(float(attributes["chapter"]))
+            except (TypeError, ValueError):
+                continue
+            if manga_id is not None:
+                latest[manga_id] = max(latest.get(manga_id, 0), number)
+
+    app.logger.info(f"Mangadex: Read {paginator.pages_fetched} pages of "
+                    f"the chapter feed")
+    return latest, newest
+
+
+def fetch_mangadex_items_by_id(
+        mangadex_ids: List[str],
+        batch_size: int = 100
+) -> Generator[List[MangadexItem], None, None]:
+    """
+    Fetches specific mangadex items, using one request per batch of IDs
+    :param mangadex_ids: The IDs of the mangadex items to fetch
+    :param batch_size: The amount of items to request at once (max. 100)
+    :return: A generator that yields the items of each batch
+             including their covers
+    """
+    url = "https://api.mangadex.org/manga"
+    for i in range(0, len(mangadex_ids), batch_size):
+        batch = mangadex_ids[i:i + batch_size]
+        response = mangadex_request(
+            url, {"ids[]": batch, "limit": len(batch)}
+        )
+        if response.status_code >= 300:
+            app.logger.warning(f"Failed to load mangadex items "
+                               f"({response.status_code})")
+            continue
+
+        items = [
+            MangadexItem.from_json(x)
+            for x in json.loads(response.text)["data"]
+        ]
+        add_covers(items)
+        yield items
+
+
 def add_covers(mangadex_items: List[MangadexItem]):
     """
     Adds cover URLs to mangadex items
@@ -103,10 +335,13 @@ def add_covers(mangadex_items: List[MangadexItem]):
         if x.cover_url is not None and len(x.cover_url) == 36
     ]
     params: Dict[str, Union[int, list]] = {"ids[]": [ids], "limit": 100}
-    response = requests.get(url, params=params)
-    data = json.loads(response.text)
-    results = data["data"]
-    time.sleep(1)
+    response = mangadex_request(url, params)
+    if response.status_code >= 300:
+        app.logger.warning(f"Failed to load mangadex covers "
+                           f"({response.status_code})")
+        results = []
+    else:
+        results = json.loads(response.text)["data"]
 
     covers = {}
     for result in results:
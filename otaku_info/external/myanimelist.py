@@ -22,10 +22,17 @@ import json
 import requests
 from requests import ConnectionError
 from requests.exceptions import ChunkedEncodingError
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict
 from jerrycan.base import app
 from otaku_info.enums import MediaType
 from otaku_info.external.entities.MyanimelistItem import MyanimelistItem
+from otaku_info.utils.rate_limiting import RateLimiter
+
+jikan_rate_limiter = RateLimiter(30)
+"""
+Rate limiter shared by all requests to the jikan API
+"""
 
 
 def load_myanimelist_item(myanimelist_id: int, media_type: MediaType) \
@@ -38,6 +45,7 @@ def load_myanimelist_item(myanimelist_id: int, media_type: MediaType) \
     """
     url = f"https://api.jikan.moe/v3/{media_type.value}/{myanimelist_id}"
 
+    jikan_rate_limiter.wait()
     try:
         response = requests.get(url)
     except (ChunkedEncodingError, ConnectionError):
@@ -46,6 +54,7 @@ def load_myanimelist_item(myanimelist_id: int, media_type: MediaType) \
     if response.status_code == 503:
         # Sometimes jikan temporarily loses connection to myanimelist
         time.sleep(2)
+        jikan_rate_limiter.wait()
         response = requests.get(url)
     elif response.status_code >= 300:
         return None
@@ -55,8 +64,34 @@ def load_myanimelist_item(myanimelist_id: int, media_type: MediaType) \
         return None
     elif data["type"] == "RateLimitException":
         app.logger.warning("Rate limited by jikan")
-        time.sleep(30)
+        jikan_rate_limiter.update(retry_after=30)
         return load_myanimelist_item(myanimelist_id, media_type)
 
     mal_item = MyanimelistItem.from_query(media_type, data)
     return mal_item
+
+
+def load_myanimelist_items(
+        myanimelist_ids: List[int],
+        media_type: MediaType,
+        workers: int = 2
+) -> Dict[int, MyanimelistItem]:
+    """
+    Loads multiple myanimelist items concurrently using the jikan API.
+    The requests share the jikan rate limit with all other jikan requests.
+    :param myanimelist_ids: The myanimelist IDs
+    :param media_type: The media type
+    :param workers: The maximum amount of concurrent requests
+    :return: The myanimelist items mapped to their IDs.
+             Items that could not be loaded are omitted
+    """
+    ids = list(set(myanimelist_ids))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            lambda x: load_myanimelist_item(x, media_type), ids
+        )
+        return {
+            _id: item
+            for _id, item in zip(ids, results)
+            if item is not None
+        }
@@ -18,26 +18,140 @@ along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
 import requests
-from typing import List, Optional
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, \
+    Future, CancelledError
+from typing import List, Optional, Tuple, Generator, Deque
 from datetime import datetime
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from jerrycan.base import app
 from otaku_info.external.entities.RedditLnRelease import RedditLnRelease
+from otaku_info.utils.page_cache import CachedPage, fetch_changed_page, \
+    store_cached_page
+
+REQUEST_HEADERS = {"User-Agent": "Mozilla/5.0"}
+"""
+The headers sent with requests to reddit
+"""
+
+LN_RELEASE_CACHE_VERSION = 3
+"""
+The version of the cached release data, needs to be incremented whenever
+the parsing of the wiki pages changes
+"""
 
 
 def load_ln_releases(year: Optional[int] = None) -> List[RedditLnRelease]:
     """
     Loads the light novel releases
+    :param year: The year for which to load the releases.
+                 If not provided, the releases of all years are loaded
+    :return: The releases, ordered by year and month
     """
-    releases: List[RedditLnRelease] = []
-    current_year = datetime.utcnow().year
-
     if year is None:
-        for year in range(2018, current_year + 2):
-            releases += load_ln_releases(year)
+        releases: List[RedditLnRelease] = []
+        for _, year_releases in iterate_ln_releases(ln_release_years()):
+            releases += year_releases
         return releases
 
-    tables = load_tables(year)
+    _, releases = list(iterate_ln_releases([year]))[0]
+    return releases
+
+
+def iterate_ln_releases(years: List[int], lookahead: int = 1) \
+        -> Generator[Tuple[int, List[RedditLnRelease]], None, None]:
+    """
+    Loads the light novel releases of multiple years.
+    While the releases of a year are being processed by the caller, the
+    wiki pages of the following years are already downloaded and parsed.
+    The parsing is done in a process pool since it is CPU-bound. The
+    process pool is only started once a page changed since it was last
+    cached.
+    If the generator is closed early, work that was not started yet is
+    cancelled.
+    :param years: The years for which to load the releases
+    :param lookahead: The amount of years that are loaded in advance
+    :return: A generator that yields the years and their releases,
+             in the order of the provided years
+    """
+    lock = threading.Lock()
+    parsers: List[ProcessPoolExecutor] = []
+    closed = threading.Event()
+
+    def parse(year: int, url: str, html: str) -> List[RedditLnRelease]:
+        """
+        Parses a wiki page in the process pool, starting it if necessary
+        :param year: The year of the releases
+        :param url: The URL of the page
+        :param html: The HTML content of the page
+        :return: The releases
+        """
+        with lock:
+            if closed.is_set():
+                raise CancelledError()
+            if len(parsers) == 0:
+                parsers.append(ProcessPoolExecutor(
+                    max_workers=min(len(years), lookahead + 1),
+                    mp_context=multiprocessing.get_context("spawn")
+                ))
+            future = parsers[0].submit(parse_ln_release_page, year, url, html)
+        return future.result()
+
+    def load(year: int) -> List[RedditLnRelease]:
+        """
+        Loads the releases of a year, using the cached releases if the
+        wiki page did not change
+        :param year: The year
+        :return: The releases
+        """
+        page = fetch_changed_ln_release_page(year)
+        if page is None:
+            return []
+        entry, html = page
+        if html is None:
+            return [RedditLnRelease.from_json(x) for x in entry.data]
+        releases = parse(year, entry.url, html)
+        entry.data = [x.to_json() for x in releases]
+        store_cached_page(entry)
+        return releases
+
+    loader = ThreadPoolExecutor(max_workers=lookahead + 1)
+    pending: Deque[Tuple[int, Future]] = deque()
+    try:
+        for year in years:
+            pending.append((year, loader.submit(load, year)))
+            if len(pending) > lookahead:
+                loaded_year, future = pending.popleft()
+                yield loaded_year, future.result()
+        while len(pending) > 0:
+            loaded_year, future = pending.popleft()
+            yield loaded_year, future.result()
+    finally:
+        with lock:
+            closed.set()
+            loader.shutdown(wait=False, cancel_futures=True)
+            for parser in parsers:
+                parser.shutdown(wait=False, cancel_futures=True)
+
+
+def parse_ln_release_page(
+        year: int,
+        url: str,
+        html: str,
+        tables_only: bool = True
+) -> List[RedditLnRelease]:
+    """
+    Parses the light novel releases of a wiki page
+    :param year: The year of the releases
+    :param url: The URL of the page
+    :param html: The HTML content of the page
+    :param tables_only: Whether or not to only parse the required tags
+    :return: The releases
+    """
+    releases: List[RedditLnRelease] = []
+    tables = parse_tables(year, url, html, tables_only)
 
     for i, table in enumerate(tables):
         month_number = i + 1
@@ -57,15 +171,46 @@ def load_ln_releases(year: Optional[int] = None) -> List[RedditLnRelease]:
     return releases
 
 
-def load_tables(year: int) -> List[BeautifulSoup]:
+def ln_release_years() -> List[int]:
+    """
+    :return: The years for which light novel releases are available
+    """
+    return list(range(2018, datetime.utcnow().year + 2))
+
+
+def fetch_changed_ln_release_page(year: int) \
+        -> Optional[Tuple[CachedPage, Optional[str]]]:
+    """
+    Downloads the wiki page containing the releases of a year unless it
+    did not change since its releases were last cached.
+    Since the upcoming releases page contains the releases of multiple
+    years relative to the current year, its cache entries are only valid
+    during the year in which they were created.
+    :param year: The year
+    :return: The cache entry of the page and the HTML content of the page or
+             None as the content if the cached releases are still valid.
+             None if no page is available for the year
+    """
+    url = ln_release_page_url(year)
+    if url is None:
+        return None
+    key = f"reddit_ln_releases_{year}_v{LN_RELEASE_CACHE_VERSION}"
+    if url.endswith("upcomingreleases"):
+        key += f"_{datetime.utcnow().year}"
+    return fetch_changed_page(key, url, REQUEST_HEADERS)
+
+
+def ln_release_page_url(year: int) -> Optional[str]:
     """
-    Loads the tables containing the release data
+    Determines the URL of the wiki page containing the releases of a year
+    :param year: The year
+    :return: The URL or None if no page is available for the year
     """
     current_year = datetime.utcnow().year
 
     # TODO Parse years from 2015-2017
     if year < 2018 or year > current_year + 1:
-        return []
+        return None
 
     url = f"https://old.reddit.com/r/LightNovels/wiki/{year}releases"
 
@@ -73,9 +218,27 @@ def load_tables(year: int) -> List[BeautifulSoup]:
         if requests.head(url).status_code >= 300:
             url = "https://old.reddit.com/r/LightNovels/wiki/upcomingreleases"
 
-    headers = {"User-Agent": "Mozilla/5.0"}
-    resp = requests.get(url, headers=headers).text
-    soup = BeautifulSoup(resp, "html.parser")
+    return url
+
+
+def parse_tables(
+        year: int,
+        url: str,
+        html: str,
+        tables_only: bool = True
+) -> List[BeautifulSoup]:
+    """
+    Parses the tables containing the release data of a wiki page
+    :param year: The year of the releases
+    :param url: The URL of the page
+    :param html: The HTML content of the page
+    :param tables_only: Whether or not to only build the tables and the
+                        month headers instead of the entire page's tree
+    :return: The tables, one per month
+    """
+    current_year = datetime.utcnow().year
+    parse_only = SoupStrainer(["tbody", "h3"]) if tables_only else None
+    soup = BeautifulSoup(html, "html.parser", parse_only=parse_only)
 
     tables = soup.find_all("tbody")
 
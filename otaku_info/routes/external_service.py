@@ -23,6 +23,7 @@ from flask_login import login_required, current_user
 from jerrycan.base import db
 from otaku_info.enums import ListService
 from otaku_info.db.ServiceUsername import ServiceUsername
+from otaku_info.utils.sync_queue import request_sync
 
 
 def define_blueprint(blueprint_name: str) -> Blueprint:
@@ -54,6 +55,7 @@ def define_blueprint(blueprint_name: str) -> Blueprint:
             service_username.username = username
 
         db.session.commit()
+        request_sync(current_user.id, service)
         return redirect(url_for("user_management.profile"))
 
     return blueprint
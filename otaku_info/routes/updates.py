@@ -23,6 +23,7 @@ from flask_login import login_required, current_user
 from otaku_info.enums import ListService, MediaType, MediaSubType
 from otaku_info.db.MediaList import MediaList
 from otaku_info.wrappers.UpdateWrapper import UpdateWrapper
+from otaku_info.utils.sync_queue import request_sync
 
 
 def define_blueprint(blueprint_name: str) -> Blueprint:
@@ -73,6 +74,8 @@ def define_blueprint(blueprint_name: str) -> Blueprint:
         include_complete = request.args.get("include_complete", "0") == "1"
         subtype_name = request.args.get("filter_subtype")
 
+        request_sync(current_user.id, ListService.ANILIST)
+
         if service_name is None \
                 or list_name is None \
                 or media_type_name is None:
@@ -0,0 +1,222 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+from unittest import mock
+from requests import ConnectionError
+from typing import Dict, Tuple, List
+from jerrycan.base import app
+import otaku_info.background.anilist as anilist_update
+from otaku_info.Config import Config
+from otaku_info.db.ListFingerprint import ListFingerprint
+from otaku_info.db.MediaUserState import MediaUserState
+from otaku_info.db.ServiceUsername import ServiceUsername
+from otaku_info.db.SyncQueueEntry import SyncQueueEntry
+from otaku_info.enums import ListService, MediaType, MediaSubType, \
+    ReleasingState, ConsumingState
+from otaku_info.external.entities.AnilistUserItem import AnilistUserItem
+from otaku_info.test.TestFramework import _TestFramework
+
+
+class TestAnilistUpdate(_TestFramework):
+    """
+    Class that tests the anilist list update
+    """
+
+    @staticmethod
+    def generate_item(media_type: MediaType, progress: int) \
+            -> AnilistUserItem:
+        """
+        Generates an anilist list entry
+        :param media_type: The media type of the entry
+        :param progress: The user's progress
+        :return: The list entry
+        """
+        return AnilistUserItem(
+            1 if media_type == MediaType.MANGA else 2,
+            ListService.ANILIST,
+            {},
+            media_type,
+            MediaSubType.MANGA
+            if media_type == MediaType.MANGA else MediaSubType.TV,
+            "Title",
+            "Taitoru",
+            "",
+            None,
+            None,
+            None,
+            None,
+            None,
+            ReleasingState.RELEASING,
+            {},
+            None,
+            progress,
+            None,
+            ConsumingState.CURRENT,
+            "Reading"
+        )
+
+    def generate_usernames(self, count: int) -> List[ServiceUsername]:
+        """
+        Generates users with anilist usernames
+        :param count: The amount of users to generate
+        :return: The anilist usernames of the users
+        """
+        usernames = []
+        for i in range(count):
+            user, _, _ = self.generate_sample_user()
+            username = ServiceUsername(
+                user_id=user.id, service=ListService.ANILIST, username=str(i)
+            )
+            self.db.session.add(username)
+            usernames.append(username)
+        self.db.session.commit()
+        return usernames
+
+    def test_skipping_unchanged_lists(self):
+        """
+        Tests that lists whose fingerprint did not change are not written
+        and that users with only unchanged lists are counted as skipped
+        :return: None
+        """
+        usernames = self.generate_usernames(3)
+        progresses: Dict[Tuple[str, MediaType], int] = {
+            (x.username, y): 1 for x in usernames for y in MediaType
+        }
+
+        def load_anilist(name: str, media_type: MediaType, rate_limiter):
+            """
+            Simulates loading an anilist list
+            :param name: The anilist username
+            :param media_type: The media type of the list
+            :param rate_limiter: The rate limiter of the list update
+            :return: The list entries
+            """
+            yield self.generate_item(
+                media_type, progresses[(name, media_type)]
+            )
+
+        def run() -> Tuple[List[ServiceUsername], List[str]]:
+            """
+            Runs the anilist update
+            :return: The users whose lists were written and the log messages
+            """
+            written = []
+            update_data = getattr(anilist_update, "__update_data")
+
+            def record(username, items):
+                """
+                Records which lists are written
+                :param username: The user whose list is written
+                :param items: The list entries
+                :return: None
+                """
+                written.append(username)
+                update_data(username, items)
+
+            with mock.patch.object(anilist_update, "load_anilist",
+                                   load_anilist), \
+                    mock.patch.object(anilist_update, "__update_data",
+                                      record), \
+                    mock.patch.object(app.logger, "info") as info, \
+                    mock.patch("time.sleep"):
+                anilist_update.update_anilist_data(usernames)
+            return written, [x[0][0] for x in info.call_args_list]
+
+        original_workers = Config.ANILIST_WORKERS
+        Config.ANILIST_WORKERS = 1
+        try:
+            written, logs = run()
+            self.assertEqual(len(written), 6)
+            self.assertEqual(ListFingerprint.query.count(), 6)
+            self.assertEqual(MediaUserState.query.count(), 6)
+            self.assertIn("Skipped 0/3 anilist users with unchanged lists",
+                          logs)
+
+            written, logs = run()
+            self.assertEqual(written, [])
+            self.assertIn("Skipped 3/3 anilist users with unchanged lists",
+                          logs)
+
+            changed = (usernames[0].user_id, MediaType.MANGA)
+            fingerprint = ListFingerprint.query.filter_by(
+                user_id=changed[0], media_type=changed[1]
+            ).first().fingerprint
+            progresses[(usernames[0].username, MediaType.MANGA)] = 2
+
+            written, logs = run()
+            self.assertEqual(written, [usernames[0]])
+            self.assertIn("Skipped 2/3 anilist users with unchanged lists",
+                          logs)
+            self.assertEqual(ListFingerprint.query.count(), 6)
+            self.assertNotEqual(ListFingerprint.query.filter_by(
+                user_id=changed[0], media_type=changed[1]
+            ).first().fingerprint, fingerprint)
+            self.assertEqual(MediaUserState.query.filter_by(
+                user_id=changed[0], media_type=changed[1]
+            ).first().progress, 2)
+        finally:
+            Config.ANILIST_WORKERS = original_workers
+
+    def test_skipping_failed_lists(self):
+        """
+        Tests that lists that could not be fetched completely are neither
+        written nor fingerprinted and that their users are not marked as
+        synced
+        :return: None
+        """
+        usernames = self.generate_usernames(2)
+
+        def load_anilist(name: str, media_type: MediaType, rate_limiter):
+            """
+            Simulates loading an anilist list whose second chunk fails to
+            load for the first user's manga list
+            :param name: The anilist username
+            :param media_type: The media type of the list
+            :param rate_limiter: The rate limiter of the list update
+            :return: The list entries
+            """
+            yield self.generate_item(media_type, 1)
+            if name == usernames[0].username and \
+                    media_type == MediaType.MANGA:
+                raise ConnectionError("Failed to load chunk 2")
+
+        with mock.patch.object(anilist_update, "load_anilist",
+                               load_anilist), \
+                mock.patch("time.sleep"):
+            anilist_update.update_anilist_data(usernames)
+
+        failed, synced = [x.user_id for x in usernames]
+        self.assertIsNone(ListFingerprint.query.filter_by(
+            user_id=failed, media_type=MediaType.MANGA
+        ).first())
+        self.assertIsNone(MediaUserState.query.filter_by(
+            user_id=failed, media_type=MediaType.MANGA
+        ).first())
+        self.assertIsNotNone(ListFingerprint.query.filter_by(
+            user_id=failed, media_type=MediaType.ANIME
+        ).first())
+        self.assertEqual(ListFingerprint.query.filter_by(
+            user_id=synced
+        ).count(), 2)
+        self.assertIsNone(
+            SyncQueueEntry.query.get((failed, ListService.ANILIST))
+        )
+        self.assertGreater(
+            SyncQueueEntry.query.get((synced, ListService.ANILIST)).last_sync,
+            0
+        )
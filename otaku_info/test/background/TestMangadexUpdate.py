@@ -0,0 +1,264 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from unittest import mock
+from typing import List
+import otaku_info.background.mangadex as mangadex_update
+from otaku_info.db.MediaItem import MediaItem
+from otaku_info.db.MediaIdMapping import MediaIdMapping
+from otaku_info.enums import ListService, MediaType, MediaSubType, \
+    ReleasingState
+from otaku_info.external.entities.MangadexItem import MangadexItem
+from otaku_info.external.entities.MyanimelistItem import MyanimelistItem
+from otaku_info.utils.checkpoints import save_checkpoint, load_checkpoint
+from otaku_info.utils.watermarks import load_watermark, store_watermark
+from otaku_info.test.TestFramework import _TestFramework
+
+
+class TestMangadexUpdate(_TestFramework):
+    """
+    Class that tests the mangadex update
+    """
+
+    def generate_media_item(
+            self,
+            service: ListService,
+            service_id: str,
+            media_type: MediaType = MediaType.MANGA
+    ) -> MediaItem:
+        """
+        Generates a media item and adds it to the database
+        :param service: The service of the media item
+        :param service_id: The ID of the media item
+        :param media_type: The media type of the media item
+        :return: The media item
+        """
+        media_item = MediaItem(
+            service=service,
+            service_id=service_id,
+            media_type=media_type,
+            media_subtype=MediaSubType.MANGA,
+            english_title=service_id,
+            romaji_title=service_id,
+            cover_url="",
+            releasing_state=ReleasingState.RELEASING
+        )
+        self.db.session.add(media_item)
+        self.db.session.commit()
+        return media_item
+
+    @staticmethod
+    def process_page(page: List[MangadexItem]) -> List[MediaIdMapping]:
+        """
+        Processes a page of mangadex items without any network requests,
+        using the IDs and mappings that exist in the database
+        :param page: The mangadex items
+        :return: The ID mappings that were written
+        """
+        written: List[MediaIdMapping] = []
+        bulk_upsert = mangadex_update.bulk_upsert
+
+        def record(model, instances, **kwargs):
+            """
+            Records which ID mappings are written
+            :param model: The model to upsert
+            :param instances: The instances to upsert
+            :param kwargs: Additional keyword arguments
+            :return: The upsert statistics
+            """
+            instances = list(instances)
+            if model == MediaIdMapping:
+                written.extend(instances)
+            return bulk_upsert(model, instances, **kwargs)
+
+        process_page = getattr(mangadex_update, "__process_page")
+        with mock.patch.object(mangadex_update, "bulk_upsert", record), \
+                mock.patch.object(mangadex_update, "load_anilist_info_batch",
+                                  return_value={}), \
+                mock.patch.object(mangadex_update, "load_myanimelist_items",
+                                  return_value={}):
+            process_page(
+                page,
+                getattr(mangadex_update, "__load_existing_ids")(),
+                getattr(mangadex_update, "__load_existing_mappings")()
+            )
+        return written
+
+    def test_loading_existing_ids(self):
+        """
+        Tests that the IDs of the manga media items are grouped by service
+        :return: None
+        """
+        self.generate_media_item(ListService.MANGADEX, "a")
+        self.generate_media_item(ListService.ANILIST, "1")
+        self.generate_media_item(ListService.ANILIST, "2")
+        self.generate_media_item(ListService.ANILIST, "3", MediaType.ANIME)
+
+        existing_ids = getattr(mangadex_update, "__load_existing_ids")()
+        self.assertEqual(set(existing_ids), set(ListService))
+        self.assertEqual(existing_ids[ListService.MANGADEX], {"a"})
+        self.assertEqual(existing_ids[ListService.ANILIST], {"1", "2"})
+        self.assertEqual(existing_ids[ListService.MYANIMELIST], set())
+
+    def test_writing_changed_id_mappings(self):
+        """
+        Tests that only new or changed ID mappings are written and that the
+        known ID mappings are updated with them
+        :return: None
+        """
+        self.generate_media_item(ListService.MANGADEX, "a")
+        self.generate_media_item(ListService.ANILIST, "1")
+        for parent_service, parent_id, service, service_id in [
+            (ListService.MANGADEX, "a", ListService.ANILIST, "1"),
+            (ListService.MANGADEX, "a", ListService.MYANIMELIST, "10"),
+            (ListService.ANILIST, "1", ListService.MANGADEX, "a")
+        ]:
+            self.db.session.add(MediaIdMapping(
+                parent_service=parent_service,
+                parent_service_id=parent_id,
+                media_type=MediaType.MANGA,
+                service=service,
+                service_id=service_id
+            ))
+        self.db.session.commit()
+
+        def generate_page() -> List[MangadexItem]:
+            """
+            :return: A page containing a single mangadex item
+            """
+            return [MangadexItem(
+                "a",
+                {ListService.ANILIST: "1", ListService.MYANIMELIST: "11"},
+                "A", "A", "", None, None, ReleasingState.RELEASING
+            )]
+
+        existing_mappings = \
+            getattr(mangadex_update, "__load_existing_mappings")()
+        self.assertEqual(len(existing_mappings), 3)
+        write_id_mappings = getattr(mangadex_update, "__write_id_mappings")
+        with mock.patch.object(mangadex_update, "bulk_upsert") as upsert:
+            write_id_mappings({
+                (ListService.MANGADEX, "a", ListService.ANILIST): "1",
+                (ListService.MANGADEX, "a", ListService.KITSU): "k"
+            }, existing_mappings)
+        self.assertEqual(
+            [(x.service, x.service_id) for x in upsert.call_args[0][1]],
+            [(ListService.KITSU, "k")]
+        )
+        self.assertEqual(
+            existing_mappings[(ListService.MANGADEX, "a", ListService.KITSU)],
+            "k"
+        )
+
+        written = self.process_page(generate_page())
+        self.assertEqual(
+            sorted((x.parent_service.value, x.service_id) for x in written),
+            [("anilist", "11"), ("mangadex", "11")]
+        )
+        mappings = {
+            (x.parent_service, x.parent_service_id, x.service): x.service_id
+            for x in MediaIdMapping.query.all()
+        }
+        self.assertEqual(len(mappings), 4)
+        self.assertEqual(
+            mappings[(ListService.ANILIST, "1", ListService.MYANIMELIST)],
+            "11"
+        )
+        self.assertEqual(
+            mappings[(ListService.MANGADEX, "a", ListService.MYANIMELIST)],
+            "11"
+        )
+
+        self.assertEqual(self.process_page(generate_page()), [])
+
+    def test_enriching_myanimelist_items(self):
+        """
+        Tests that missing myanimelist items are loaded using jikan and
+        linked to the mangadex items
+        :return: None
+        """
+        self.generate_media_item(ListService.MYANIMELIST, "20")
+        page = [
+            MangadexItem(
+                mangadex_id,
+                {ListService.MYANIMELIST: myanimelist_id},
+                mangadex_id, mangadex_id, "", None, None,
+                ReleasingState.RELEASING
+            )
+            for mangadex_id, myanimelist_id in [("a", "20"), ("b", "21")]
+        ]
+        myanimelist_item = MyanimelistItem(
+            21, ListService.MYANIMELIST, {}, MediaType.MANGA,
+            MediaSubType.MANGA, "B", "B", "", 5, None, None, None, None,
+            ReleasingState.RELEASING, {}
+        )
+
+        with mock.patch.object(mangadex_update, "load_myanimelist_items",
+                               return_value={21: myanimelist_item}) as load:
+            process_page = getattr(mangadex_update, "__process_page")
+            existing_ids = getattr(mangadex_update, "__load_existing_ids")()
+            with mock.patch.object(mangadex_update, "load_anilist_info_batch",
+                                   return_value={}):
+                process_page(page, existing_ids, {})
+        load.assert_called_once_with([21], MediaType.MANGA)
+        self.assertEqual(
+            existing_ids[ListService.MYANIMELIST], {"20", "21"}
+        )
+
+        media_item = MediaItem.query.filter_by(
+            service=ListService.MYANIMELIST, service_id="21"
+        ).first()
+        self.assertEqual(media_item.english_title, "B")
+        self.assertEqual(media_item.latest_release, 5)
+        for myanimelist_id, mangadex_id in [("20", "a"), ("21", "b")]:
+            self.assertEqual(MediaIdMapping.query.filter_by(
+                parent_service=ListService.MYANIMELIST,
+                parent_service_id=myanimelist_id,
+                service=ListService.MANGADEX
+            ).first().service_id, mangadex_id)
+
+    def test_finishing_full_crawls(self):
+        """
+        Tests that finishing a full crawl only moves the modification date
+        watermark forward
+        :return: None
+        """
+        def iterate_pages(paginator):
+            """
+            Simulates a full crawl that has no pages left
+            :param paginator: The paginator of the crawl
+            :return: The pages
+            """
+            paginator.complete = True
+            return iter([])
+
+        watermark = mangadex_update.UPDATED_AT_WATERMARK
+        job = mangadex_update.FULL_CRAWL_JOB
+        for stored, expected in [
+            ("2000-01-01T00:00:00", "2001-09-09T01:46:40"),
+            ("2030-01-01T00:00:00", "2030-01-01T00:00:00")
+        ]:
+            store_watermark(watermark, stored)
+            with mock.patch("time.time", return_value=1000000000):
+                save_checkpoint(job, "1970-01-01T00:00:00|")
+            with mock.patch.object(mangadex_update, "iterate_mangadex_pages",
+                                   iterate_pages):
+                mangadex_update.update_mangadex_data(full=True)
+            self.assertIsNone(load_checkpoint(job))
+            self.assertEqual(load_watermark(watermark), expected)
@@ -0,0 +1,260 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+from unittest import mock
+from otaku_info.db.MediaItem import MediaItem
+from otaku_info.db.MangaChapterGuess import MangaChapterGuess, \
+    MIN_UPDATE_INTERVAL, MAX_UPDATE_INTERVAL, SAMPLE_WINDOW, RELEASE_WINDOW, \
+    RELEASE_PERIOD_FRACTION
+from otaku_info.enums import ListService, MediaType, MediaSubType, \
+    ReleasingState
+from otaku_info.test.TestFramework import _TestFramework
+
+
+class TestMangaChapterGuess(_TestFramework):
+    """
+    Class that tests the manga chapter guess model
+    """
+
+    @staticmethod
+    def generate_guess(
+            releasing_state: ReleasingState = ReleasingState.RELEASING
+    ) -> MangaChapterGuess:
+        """
+        Generates a chapter guess that has not been added to the session
+        :param releasing_state: The releasing state of the manga
+        :return: The chapter guess
+        """
+        media_item = MediaItem(
+            service=ListService.ANILIST,
+            service_id="1",
+            media_type=MediaType.MANGA,
+            media_subtype=MediaSubType.MANGA,
+            english_title="A",
+            romaji_title="A",
+            cover_url="",
+            releasing_state=releasing_state
+        )
+        return MangaChapterGuess(
+            service=ListService.ANILIST,
+            service_id="1",
+            media_type=MediaType.MANGA,
+            guess=None,
+            last_update=0,
+            last_change=0,
+            update_interval=MIN_UPDATE_INTERVAL,
+            next_update=0,
+            last_activity_id=0,
+            progress_samples="",
+            release_history="",
+            media_item=media_item
+        )
+
+    def test_scheduling_changed_guesses(self):
+        """
+        Tests that a changed guess is updated again as soon as possible and
+        that increases of the guess are recorded as releases
+        :return: None
+        """
+        guess = self.generate_guess()
+        with mock.patch("time.time", return_value=1000):
+            guess.update_guess(10)
+        self.assertEqual(guess.guess, 10)
+        self.assertEqual(guess.last_change, 1000)
+        self.assertEqual(guess.update_interval, MIN_UPDATE_INTERVAL)
+        self.assertEqual(guess.next_update, 1000 + MIN_UPDATE_INTERVAL)
+        self.assertEqual(guess.release_times, [])
+
+        for i, now in enumerate([5000, 9000, 21000]):
+            with mock.patch("time.time", return_value=now):
+                guess.update_guess(11 + i)
+            self.assertEqual(guess.last_change, now)
+            self.assertEqual(guess.update_interval, MIN_UPDATE_INTERVAL)
+        self.assertEqual(guess.release_times, [21000, 9000, 5000])
+        self.assertEqual(guess.release_period, 8000)
+
+        with mock.patch("time.time", return_value=22000):
+            guess.update_guess(12)
+        self.assertEqual(guess.release_times, [21000, 9000, 5000])
+
+    def test_estimating_release_periods(self):
+        """
+        Tests that the release period is the median of the time between
+        the recently detected releases
+        :return: None
+        """
+        guess = self.generate_guess()
+        self.assertIsNone(guess.release_period)
+        guess.release_history = "100"
+        self.assertIsNone(guess.release_period)
+        guess.release_history = "900,500,400,100"
+        self.assertEqual(guess.release_period, 300)
+
+        guess.guess = 1
+        for i in range(RELEASE_WINDOW + 5):
+            with mock.patch("time.time", return_value=1000 + i * 100):
+                guess.update_guess(2 + i)
+        self.assertEqual(len(guess.release_times), RELEASE_WINDOW)
+        self.assertEqual(guess.release_period, 100)
+
+    def test_scheduling_weekly_series(self):
+        """
+        Tests that the releases of a weekly series are detected at most one
+        minimum update interval after they happen once the release period
+        is known, even if they are a few hours early or late, while
+        updating far less often than hourly
+        :return: None
+        """
+        week = 7 * 24 * 60 * 60
+        offsets = [0, 5, -3, 2, 7, -6, 1, 4, -2, 0, 3, -5, 6, -1, 2]
+        releases = [
+            1000000 + i * week + offset * 60 * 60
+            for i, offset in enumerate(offsets)
+        ]
+        guess = self.generate_guess()
+        now = releases[0]
+        lags = []
+        updates = 0
+
+        while now < releases[-1] + week:
+            chapter = len([x for x in releases if x <= now])
+            previous = guess.guess
+            with mock.patch("time.time", return_value=now):
+                guess.update_guess(chapter)
+            if previous is not None and chapter != previous:
+                lags.append(now - releases[chapter - 1])
+            updates += 1
+            now = guess.next_update
+
+        self.assertEqual(len(lags), len(releases) - 1)
+        self.assertAlmostEqual(guess.release_period, week, delta=week / 8)
+        self.assertLessEqual(max(lags[0:2]), week // RELEASE_PERIOD_FRACTION)
+        self.assertLessEqual(max(lags[2:]), MIN_UPDATE_INTERVAL)
+        self.assertLess(updates, len(releases) * week / (60 * 60) / 3)
+
+    def test_scheduling_unchanged_guesses(self):
+        """
+        Tests that the update interval grows while a guess does not change
+        and that it is clamped to the minimum interval and to a fraction of
+        the maximum interval while the release period is unknown
+        :return: None
+        """
+        guess = self.generate_guess()
+        with mock.patch("time.time", return_value=1000):
+            guess.update_guess(10)
+        with mock.patch("time.time", return_value=2000):
+            guess.update_guess(10)
+        self.assertEqual(guess.update_interval, MIN_UPDATE_INTERVAL * 1.5)
+        self.assertEqual(guess.last_change, 1000)
+
+        for _ in range(20):
+            with mock.patch("time.time", return_value=3000):
+                guess.update_guess(10)
+        interval = MAX_UPDATE_INTERVAL // RELEASE_PERIOD_FRACTION
+        self.assertEqual(guess.update_interval, interval)
+        self.assertEqual(guess.next_update, 3000 + interval)
+
+        with mock.patch("time.time", return_value=3060):
+            guess.update_guess(11)
+        self.assertEqual(guess.update_interval, MIN_UPDATE_INTERVAL)
+
+    def test_scheduling_finished_series(self):
+        """
+        Tests that guesses of finished or cancelled series are updated as
+        rarely as possible
+        :return: None
+        """
+        for state in [ReleasingState.FINISHED, ReleasingState.CANCELLED]:
+            guess = self.generate_guess(state)
+            with mock.patch("time.time", return_value=1000):
+                guess.update_guess(10)
+            self.assertEqual(guess.update_interval, MAX_UPDATE_INTERVAL)
+            self.assertEqual(guess.next_update, 1000 + MAX_UPDATE_INTERVAL)
+
+    def test_adding_samples(self):
+        """
+        Tests that only samples newer than the newest known activity are
+        added and that the guess is the most common recent progress
+        :return: None
+        """
+        guess = self.generate_guess()
+        guess.add_samples([(5, 10), (4, 9), (3, 9)])
+        self.assertEqual(guess.samples, [10, 9, 9])
+        self.assertEqual(guess.last_activity_id, 5)
+        self.assertEqual(guess.guess, 9)
+
+        guess.add_samples([(5, 50), (4, 50), (1, 50)])
+        self.assertEqual(guess.samples, [10, 9, 9])
+        self.assertEqual(guess.last_activity_id, 5)
+        self.assertEqual(guess.guess, 9)
+
+        guess.add_samples([(7, 11), (6, 11), (5, 50)])
+        self.assertEqual(guess.samples, [11, 11, 10, 9, 9])
+        self.assertEqual(guess.last_activity_id, 7)
+        self.assertEqual(guess.guess, 11)
+
+    def test_resolving_ties(self):
+        """
+        Tests that ties between progresses are resolved in favour of the
+        newer sample
+        :return: None
+        """
+        guess = self.generate_guess()
+        guess.add_samples([(2, 12), (1, 11)])
+        self.assertEqual(guess.guess, 12)
+
+        guess.add_samples([(4, 11), (3, 12)])
+        self.assertEqual(guess.samples, [11, 12, 12, 11])
+        self.assertEqual(guess.guess, 11)
+
+    def test_trimming_samples(self):
+        """
+        Tests that only the newest samples are kept
+        :return: None
+        """
+        guess = self.generate_guess()
+        guess.add_samples([(x, x) for x in range(100, 0, -1)])
+        self.assertEqual(len(guess.samples), SAMPLE_WINDOW)
+        self.assertEqual(guess.samples[0], 100)
+        self.assertEqual(guess.samples[-1], 100 - SAMPLE_WINDOW + 1)
+        self.assertEqual(guess.last_activity_id, 100)
+
+        guess.add_samples([(101, 5)])
+        self.assertEqual(len(guess.samples), SAMPLE_WINDOW)
+        self.assertEqual(guess.samples[0:2], [5, 100])
+
+    def test_keeping_released_chapters(self):
+        """
+        Tests that a chapter released through the mangadex chapter feed
+        stays the minimum of the guess when new samples are added
+        :return: None
+        """
+        guess = self.generate_guess()
+        guess.add_samples([(2, 50), (1, 50)])
+        guess.add_release(57)
+        self.assertEqual(guess.guess, 57)
+        self.assertEqual(guess.released_chapter, 57)
+
+        guess.add_samples([(4, 52), (3, 52)])
+        self.assertEqual(guess.guess, 57)
+
+        guess.add_release(55)
+        self.assertEqual(guess.released_chapter, 57)
+
+        guess.add_samples([(7, 60), (6, 60), (5, 60)])
+        self.assertEqual(guess.guess, 60)
@@ -17,8 +17,12 @@ You should have received a copy of the GNU General Public License
 along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
-from otaku_info.enums import MediaType
-from otaku_info.external.anilist import load_anilist_info
+from otaku_info.enums import MediaType, ListService
+from unittest import mock
+from requests import ConnectionError
+from otaku_info.external.anilist import load_anilist_info, \
+    load_anilist_info_batch, load_manga_progress_samples, anilist_client, \
+    load_anilist
 from otaku_info.test.TestFramework import _TestFramework
 
 
@@ -35,3 +39,117 @@ class TestAnilist(_TestFramework):
         item = load_anilist_info(9253, MediaType.ANIME)
         self.assertIsNotNone(item)
         self.assertEqual(item.english_title, "Steins;Gate")
+
+    def test_retrieving_anilist_items_in_batch(self):
+        """
+        Tests retrieving multiple anilist items using a single request
+        :return: None
+        """
+        items = load_anilist_info_batch([9253, 1], MediaType.ANIME)
+        self.assertEqual(items[9253].english_title, "Steins;Gate")
+        self.assertEqual(items[1].english_title, "Cowboy Bebop")
+
+        items = load_anilist_info_batch(
+            [9253], MediaType.ANIME, ListService.MYANIMELIST
+        )
+        self.assertEqual(items[9253].id, 9253)
+
+    def test_loading_progress_samples(self):
+        """
+        Tests parsing the aliased activity queries for multiple manga
+        :return: None
+        """
+        queries = []
+
+        def query(graphql, _):
+            """
+            Simulates the anilist API
+            :param graphql: The GraphQL query
+            :return: The response
+            """
+            queries.append(graphql)
+            return {"data": {
+                "media_1": {"activities": [
+                    {"id": 9, "progress": "3 - 4", "status": "read chapter"},
+                    {
+                        "id": 8,
+                        "status": "completed",
+                        "media": {"chapters": 20}
+                    },
+                    {"id": 7, "progress": None, "status": "plans to read"}
+                ]},
+                "media_2": None,
+                "media_3": {"activities": []}
+            }}
+
+        with mock.patch.object(anilist_client, "query", query):
+            samples = load_manga_progress_samples({1: 5, 2: 0, 3: 0}, 2)
+
+        self.assertEqual(len(queries), 2)
+        self.assertIn("media_1: Page", queries[0])
+        self.assertIn("media_2: Page", queries[0])
+        self.assertIn("id_greater: 5", queries[0])
+        self.assertIn("media_3: Page", queries[1])
+        self.assertEqual(samples, {1: [(9, 4), (8, 20)], 3: []})
+
+    def test_loading_chunked_lists(self):
+        """
+        Tests loading a list in chunks, waiting for the rate limiter before
+        each chunk, and that a failed chunk raises an error
+        :return: None
+        """
+        def entry(anilist_id: int):
+            """
+            Generates the query data of a list entry
+            :param anilist_id: The anilist ID of the entry's media
+            :return: The query data
+            """
+            return {
+                "progress": 1,
+                "progressVolumes": None,
+                "score": 0,
+                "status": "CURRENT",
+                "media": {
+                    "id": anilist_id,
+                    "idMal": None,
+                    "chapters": None,
+                    "volumes": None,
+                    "episodes": None,
+                    "status": "RELEASING",
+                    "format": "MANGA",
+                    "title": {"english": None, "romaji": str(anilist_id)},
+                    "coverImage": {"large": ""},
+                    "nextAiringEpisode": None
+                }
+            }
+
+        chunks = [[entry(1), entry(2)], [entry(3)]]
+
+        def query(_, variables):
+            """
+            Simulates the anilist API
+            :param variables: The query variables
+            :return: The response
+            """
+            chunk = variables["chunk"]
+            if chunk > len(chunks):
+                return None
+            return {"data": {"MediaListCollection": {
+                "hasNextChunk": chunk < 2,
+                "lists": [{
+                    "name": "Reading", "entries": chunks[chunk - 1]
+                }]
+            }}}
+
+        rate_limiter = mock.Mock()
+        with mock.patch.object(anilist_client, "query", query):
+            items = list(load_anilist(
+                "user", MediaType.MANGA, 2, rate_limiter
+            ))
+            self.assertEqual([x.id for x in items], [1, 2, 3])
+            self.assertEqual(items[0].list_name, "Reading")
+            self.assertEqual(rate_limiter.wait.call_count, 2)
+
+            chunks.pop()
+            with self.assertRaises(ConnectionError):
+                list(load_anilist("user", MediaType.MANGA, 2))
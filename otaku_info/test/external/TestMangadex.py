@@ -17,7 +17,13 @@ You should have received a copy of the GNU General Public License
 along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
-from otaku_info.external.mangadex import fetch_mangadex_item, add_covers
+import json
+from typing import List, Dict, Any, Callable
+from datetime import datetime, timedelta
+from unittest import mock
+from otaku_info.external.mangadex import fetch_mangadex_item, add_covers, \
+    MangadexPaginator, fetch_mangadex_items_by_id, \
+    fetch_latest_mangadex_chapters
 from otaku_info.test.TestFramework import _TestFramework
 
 
@@ -38,3 +44,217 @@ class TestMangadex(_TestFramework):
         add_covers([item])
         self.assertGreater(len(item.cover_url), 36)
         self.assertTrue(item.cover_url.startswith("http"))
+
+    def test_retrieving_mangadex_items_by_id(self):
+        """
+        Tests retrieving multiple mangadex items with a single request
+        :return: None
+        """
+        ids = [
+            "30f3ac69-21b6-45ad-a110-d011b7aaadaa",
+            "a96676e5-8ae2-425e-b549-7f15dd34a6d8"
+        ]
+        pages = list(fetch_mangadex_items_by_id(ids))
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(
+            sorted(x.mangadex_id for x in pages[0]), sorted(ids)
+        )
+        for item in pages[0]:
+            self.assertTrue(item.cover_url.startswith("http"))
+
+    def test_reading_chapter_feed(self):
+        """
+        Tests reading the latest chapters from the chapter feed
+        :return: None
+        """
+        since = (datetime.utcnow() - timedelta(days=1))\
+            .strftime("%Y-%m-%dT%H:%M:%S")
+        latest, newest = fetch_latest_mangadex_chapters(since)
+        self.assertGreater(len(latest), 0)
+        self.assertGreater(newest, since)
+        for mangadex_id, chapter in latest.items():
+            self.assertEqual(len(mangadex_id), 36)
+            self.assertGreaterEqual(chapter, 0)
+
+    @staticmethod
+    def simulate_mangadex_api(
+            items: List[Dict[str, Any]],
+            requests_made: List[Dict[str, Any]]
+    ) -> Callable[[str, Dict[str, Any]], mock.Mock]:
+        """
+        Creates a function that simulates the mangadex API when used in
+        place of requests.get
+        :param items: The items provided by the simulated API
+        :param requests_made: List to which the parameters of each request
+                              are appended
+        :return: The function
+        """
+        def get(_, params):
+            """
+            Simulates the mangadex API, ordering the items by creation date
+            :param _: The URL
+            :param params: The query parameters
+            :return: The response
+            """
+            requests_made.append(params)
+            since = params["createdAtSince"]
+            matching = [
+                x for x in items if x["attributes"]["createdAt"] >= since
+            ][params["offset"]:][0:params["limit"]]
+            return mock.Mock(status_code=200,
+                             text=json.dumps({"data": matching}))
+        return get
+
+    def test_keyset_pagination(self):
+        """
+        Tests that the paginator advances using the date of the last item
+        and suppresses items it already returned
+        :return: None
+        """
+        items = [
+            {"id": str(i), "attributes": {
+                "createdAt": f"2021-01-0{i // 2 + 1}T00:00:00+00:00"
+            }}
+            for i in range(7)
+        ]
+        requests_made: List[Dict[str, Any]] = []
+        get = self.simulate_mangadex_api(items, requests_made)
+
+        with mock.patch("requests.get", get), mock.patch("time.sleep"):
+            paginator = MangadexPaginator(page_size=3)
+            pages = list(paginator)
+            self.assertEqual(
+                [[x["id"] for x in page] for page in pages],
+                [["0", "1", "2"], ["3", "4"], ["5", "6"]]
+            )
+            self.assertTrue(paginator.complete)
+            self.assertEqual(paginator.pages_fetched, 4)
+            self.assertEqual(paginator.duplicates, 3)
+            self.assertTrue(all(x["offset"] == 0 for x in requests_made))
+
+            resumed = MangadexPaginator.from_cursor("2021-01-03T00:00:00|4")
+            resumed.page_size = 3
+            self.assertEqual(
+                [[x["id"] for x in page] for page in resumed],
+                [["5", "6"]]
+            )
+
+    def test_paginating_shared_dates(self):
+        """
+        Tests that the paginator skips past items that share a date when
+        there are more of them than fit on a page
+        :return: None
+        """
+        items = [
+            {"id": str(i), "attributes": {
+                "createdAt": f"2021-01-0{min(i, 1) + i // 8 + 1}T00:00:00"
+            }}
+            for i in range(9)
+        ]
+        requests_made: List[Dict[str, Any]] = []
+        get = self.simulate_mangadex_api(items, requests_made)
+
+        with mock.patch("requests.get", get), mock.patch("time.sleep"):
+            paginator = MangadexPaginator(page_size=3)
+            self.assertEqual(
+                [[x["id"] for x in page] for page in paginator],
+                [["0", "1", "2"], ["3"], ["4", "5", "6"], ["7", "8"]]
+            )
+            self.assertEqual(paginator.pages_fetched, 4)
+            self.assertEqual(paginator.duplicates, 2)
+            self.assertEqual(
+                [x["offset"] for x in requests_made], [0, 0, 3, 6]
+            )
+
+    def test_retrying_failed_requests(self):
+        """
+        Tests that failed requests are retried with a growing delay and
+        that the pagination stops if all attempts fail
+        :return: None
+        """
+        items = [
+            {"id": str(i), "attributes": {
+                "createdAt": f"2021-01-0{i + 1}T00:00:00"
+            }}
+            for i in range(2)
+        ]
+        requests_made: List[Dict[str, Any]] = []
+        simulated_get = self.simulate_mangadex_api(items, requests_made)
+        failures = [1]
+
+        def get(url, params):
+            """
+            Simulates a mangadex API whose requests fail a number of times
+            :param url: The URL
+            :param params: The query parameters
+            :return: The response
+            """
+            if failures[0] > 0:
+                failures[0] -= 1
+                return mock.Mock(status_code=503, text="")
+            return simulated_get(url, params)
+
+        with mock.patch("requests.get", get), \
+                mock.patch("time.sleep") as sleep, \
+                mock.patch("otaku_info.external.mangadex."
+                           "mangadex_rate_limiter"):
+            paginator = MangadexPaginator(page_size=3, retries=2)
+            self.assertEqual(
+                [[x["id"] for x in page] for page in paginator], [["0", "1"]]
+            )
+            self.assertTrue(paginator.complete)
+            self.assertEqual([x[0][0] for x in sleep.call_args_list], [1])
+
+            failures[0] = 3
+            sleep.reset_mock()
+            paginator = MangadexPaginator(page_size=3, retries=2)
+            self.assertEqual(list(paginator), [])
+            self.assertFalse(paginator.complete)
+            self.assertEqual(paginator.pages_fetched, 0)
+            self.assertEqual(
+                [x[0][0] for x in sleep.call_args_list], [1, 2]
+            )
+
+    def test_failing_to_skip_shared_dates(self):
+        """
+        Tests that a failed request for the items past a page of items
+        sharing a date stops the pagination at a cursor from which it can
+        be resumed
+        :return: None
+        """
+        items = [
+            {"id": str(i), "attributes": {
+                "createdAt": "2021-01-01T00:00:00"
+            }}
+            for i in range(7)
+        ]
+        requests_made: List[Dict[str, Any]] = []
+        simulated_get = self.simulate_mangadex_api(items, requests_made)
+
+        def get(url, params):
+            """
+            Simulates a mangadex API whose requests with an offset fail
+            :param url: The URL
+            :param params: The query parameters
+            :return: The response
+            """
+            if params["offset"] > 0:
+                return mock.Mock(status_code=500, text="")
+            return simulated_get(url, params)
+
+        with mock.patch("requests.get", get), mock.patch("time.sleep"):
+            paginator = MangadexPaginator(page_size=3, retries=1)
+            self.assertEqual(
+                [[x["id"] for x in page] for page in paginator],
+                [["0", "1", "2"]]
+            )
+            self.assertFalse(paginator.complete)
+            self.assertEqual(paginator.cursor, "2021-01-01T00:00:00|0,1,2")
+
+        with mock.patch("requests.get", simulated_get):
+            resumed = MangadexPaginator.from_cursor(paginator.cursor)
+            resumed.page_size = 3
+            self.assertEqual(
+                [[x["id"] for x in page] for page in resumed],
+                [["3", "4", "5"], ["6"]]
+            )
@@ -17,8 +17,10 @@ You should have received a copy of the GNU General Public License
 along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
+from unittest import mock
 from otaku_info.enums import MediaType
-from otaku_info.external.myanimelist import load_myanimelist_item
+from otaku_info.external.myanimelist import load_myanimelist_item, \
+    load_myanimelist_items
 from otaku_info.test.TestFramework import _TestFramework
 
 
@@ -35,3 +37,28 @@ class TestMyanimelist(_TestFramework):
         item = load_myanimelist_item(9253, MediaType.ANIME)
         self.assertIsNotNone(item)
         self.assertEqual(item.english_title, "Steins;Gate")
+
+    def test_retrieving_multiple_myanimelist_items(self):
+        """
+        Tests retrieving multiple myanimelist items concurrently
+        :return: None
+        """
+        requested = []
+
+        def load(myanimelist_id: int, media_type: MediaType):
+            """
+            Simulates loading a myanimelist item using jikan
+            :param myanimelist_id: The myanimelist ID
+            :param media_type: The media type
+            :return: The myanimelist item, None for odd IDs
+            """
+            requested.append(myanimelist_id)
+            self.assertEqual(media_type, MediaType.MANGA)
+            return None if myanimelist_id % 2 else f"item{myanimelist_id}"
+
+        with mock.patch(
+                "otaku_info.external.myanimelist.load_myanimelist_item", load
+        ):
+            items = load_myanimelist_items([1, 2, 3, 4, 2], MediaType.MANGA)
+        self.assertEqual(items, {2: "item2", 4: "item4"})
+        self.assertEqual(sorted(requested), [1, 2, 3, 4])
@@ -17,7 +17,13 @@ You should have received a copy of the GNU General Public License
 along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
-from otaku_info.external.reddit import load_ln_releases
+import json
+import pickle
+from unittest import mock
+from otaku_info.external.entities.RedditLnRelease import RedditLnRelease
+from otaku_info.external.reddit import load_ln_releases, \
+    iterate_ln_releases, parse_ln_release_page
+from otaku_info.utils.page_cache import CachedPage
 from otaku_info.test.TestFramework import _TestFramework
 
 
@@ -37,3 +43,153 @@ class TestReddit(_TestFramework):
             items[0].series_name,
             "The Master of Ragnarok & Blesser of Einherjar"
         )
+
+    def test_retrieving_multiple_years(self):
+        """
+        Tests retrieving the releases of multiple years at once
+        :return: None
+        """
+        years = [2019, 2018, 2017]
+        results = list(iterate_ln_releases(years))
+        self.assertEqual([x[0] for x in results], years)
+        self.assertEqual(
+            [x.series_name for x in results[0][1]],
+            [x.series_name for x in load_ln_releases(2019)]
+        )
+        self.assertEqual(results[2][1], [])
+
+    def test_parsing_tables_only(self):
+        """
+        Tests that only parsing the release tables of a wiki page results in
+        the same releases as parsing the entire page
+        :return: None
+        """
+        months = [
+            "January", "February", "March", "April", "May", "June", "July",
+            "August", "September", "October", "November", "December"
+        ]
+        sidebar = "<div><a href='/r/LightNovels'>Sidebar</a></div>" * 10
+        tables = "".join(
+            f"<h3>{month} 2019</h3><table><tbody><tr>"
+            f"<td>{month} {i + 1}</td>"
+            f"<td><a href='https://myanimelist.net/manga/{i}'>S{i}</a></td>"
+            f"<td>{i}</td><td>Yen Press</td><td>Digital</td>"
+            f"</tr></tbody></table>"
+            for i, month in enumerate(months)
+        )
+        empty = "<table><tbody></tbody></table>"
+        html = f"<html><body>{sidebar}{empty}{empty}{tables}{empty}</body>" \
+               f"</html>"
+        url = "https://old.reddit.com/r/LightNovels/wiki/2019releases"
+
+        full = parse_ln_release_page(2019, url, html, False)
+        tables_only = parse_ln_release_page(2019, url, html, True)
+        self.assertEqual(len(full), 12)
+        self.assertEqual(
+            [(x.series_name, x.release_date) for x in full],
+            [(x.series_name, x.release_date) for x in tables_only]
+        )
+        self.assertEqual(tables_only[3].myanimelist_id, 3)
+        self.assertEqual(tables_only[3].release_date.month, 4)
+
+    def test_precomputed_fields(self):
+        """
+        Tests that the derived fields of a release are computed on
+        construction and survive pickling
+        :return: None
+        """
+        release = RedditLnRelease(
+            "Series", 2020, "March 3", "1", "Yen Press", None,
+            "https://myanimelist.net/manga/12345/Series", True, False
+        )
+        self.assertFalse(hasattr(release, "__dict__"))
+        self.assertEqual(release.release_date_string, "2020-03-03")
+        self.assertEqual(release.myanimelist_id, 12345)
+
+        unpickled = pickle.loads(pickle.dumps(release))
+        self.assertEqual(unpickled.release_date, release.release_date)
+        self.assertEqual(unpickled.myanimelist_id, 12345)
+
+    def test_converting_to_json(self):
+        """
+        Tests that releases can be restored from their JSON representation
+        :return: None
+        """
+        release = RedditLnRelease(
+            "Series", 2020, "December 24", "2", None,
+            "https://example.com", None, False, True
+        )
+        data = json.loads(json.dumps(release.to_json()))
+        restored = RedditLnRelease.from_json(data)
+        for attribute in RedditLnRelease.__slots__:
+            self.assertEqual(
+                getattr(restored, attribute), getattr(release, attribute)
+            )
+
+    def test_starting_parser_processes(self):
+        """
+        Tests that parser processes are only started for changed pages and
+        that only the releases of one year are loaded in advance
+        :return: None
+        """
+        release = RedditLnRelease(
+            "Series", 2020, "March 3", "1", None, None, None, True, False
+        )
+        cached = CachedPage("", "", None, None, "", [release.to_json()])
+        pages = {2019: (cached, None), 2020: None}
+
+        def fetch(year):
+            """
+            Mocks downloading the wiki page of a year
+            :param year: The year
+            :return: The cache entry of the page and its content
+            """
+            return pages[year]
+
+        with mock.patch(
+            "otaku_info.external.reddit.fetch_changed_ln_release_page",
+            fetch
+        ), mock.patch(
+            "otaku_info.external.reddit.ProcessPoolExecutor"
+        ) as executor, mock.patch(
+            "otaku_info.external.reddit.store_cached_page"
+        ):
+            results = list(iterate_ln_releases([2019, 2020]))
+            executor.assert_not_called()
+            self.assertEqual(results[0][1][0].series_name, "Series")
+            self.assertEqual(results[1], (2020, []))
+
+            pages.update({x: (cached, "") for x in range(2010, 2020)})
+            executor.return_value.submit.return_value.result.return_value = []
+            list(iterate_ln_releases(list(range(2010, 2021))))
+            self.assertEqual(executor.call_args[1]["max_workers"], 2)
+            self.assertEqual(executor.return_value.submit.call_count, 10)
+            executor.return_value.shutdown.assert_called_once()
+
+    def test_stopping_early(self):
+        """
+        Tests that closing the generator early cancels the loading of the
+        remaining years
+        :return: None
+        """
+        cached = CachedPage("", "", None, None, "", [])
+        fetched = []
+
+        def fetch(year):
+            """
+            Mocks downloading the wiki page of a year
+            :param year: The year
+            :return: The cache entry of the page and its content
+            """
+            fetched.append(year)
+            return cached, None
+
+        with mock.patch(
+            "otaku_info.external.reddit.fetch_changed_ln_release_page",
+            fetch
+        ):
+            releases = iterate_ln_releases(list(range(2010, 2021)))
+            self.assertEqual(next(releases), (2010, []))
+            releases.close()
+        self.assertEqual(sorted(fetched)[0], 2010)
+        self.assertLessEqual(len(fetched), 2)
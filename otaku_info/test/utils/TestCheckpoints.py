@@ -0,0 +1,54 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+from otaku_info.db.JobCheckpoint import JobCheckpoint
+from otaku_info.utils.checkpoints import TimeBudget, load_checkpoint, \
+    save_checkpoint, clear_checkpoint
+from otaku_info.test.TestFramework import _TestFramework
+
+
+class TestCheckpoints(_TestFramework):
+    """
+    Class that tests the job checkpoints
+    """
+
+    def test_saving_checkpoints(self):
+        """
+        Tests saving, resuming and clearing checkpoints
+        :return: None
+        """
+        self.assertIsNone(load_checkpoint("test"))
+
+        save_checkpoint("test", "1")
+        started_at = load_checkpoint("test").started_at
+        save_checkpoint("test", "2")
+        checkpoint = load_checkpoint("test")
+        self.assertEqual(checkpoint.cursor, "2")
+        self.assertEqual(checkpoint.started_at, started_at)
+        self.assertEqual(JobCheckpoint.query.count(), 1)
+
+        clear_checkpoint("test")
+        self.assertIsNone(load_checkpoint("test"))
+
+    def test_time_budget(self):
+        """
+        Tests the time budget
+        :return: None
+        """
+        self.assertFalse(TimeBudget(60).exhausted())
+        self.assertTrue(TimeBudget(0).exhausted())
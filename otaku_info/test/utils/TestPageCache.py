@@ -0,0 +1,202 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+import os
+import stat
+import shutil
+import tempfile
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from otaku_info.Config import Config
+from otaku_info.utils.page_cache import CachedPage, load_cached_page, \
+    store_cached_page, fetch_changed_page
+from otaku_info.test.TestFramework import _TestFramework
+
+
+class TestPageCache(_TestFramework):
+    """
+    Class that tests the page cache
+    """
+
+    def setUp(self):
+        """
+        Uses a temporary directory as the page cache
+        :return: None
+        """
+        super().setUp()
+        self.original_cache_path = Config.PAGE_CACHE_PATH
+        Config.PAGE_CACHE_PATH = os.path.join(tempfile.mkdtemp(), "cache")
+
+    def tearDown(self):
+        """
+        Removes the temporary page cache
+        :return: None
+        """
+        shutil.rmtree(os.path.dirname(Config.PAGE_CACHE_PATH))
+        Config.PAGE_CACHE_PATH = self.original_cache_path
+        super().tearDown()
+
+    def test_storing_pages(self):
+        """
+        Tests storing and loading cached pages
+        :return: None
+        """
+        self.assertIsNone(load_cached_page("test"))
+        store_cached_page(
+            CachedPage("test", "https://example.com", "1", None, "A", [1])
+        )
+        page = load_cached_page("test")
+        self.assertEqual(page.etag, "1")
+        self.assertEqual(page.data, [1])
+        self.assertIsNone(load_cached_page("other"))
+
+        mode = os.stat(Config.PAGE_CACHE_PATH).st_mode
+        self.assertEqual(stat.S_IMODE(mode), 0o700)
+
+    def test_discarding_invalid_pages(self):
+        """
+        Tests that cache files that can't be read are ignored
+        :return: None
+        """
+        store_cached_page(
+            CachedPage("test", "https://example.com", "1", None, "A", [1])
+        )
+        for filename in os.listdir(Config.PAGE_CACHE_PATH):
+            with open(os.path.join(Config.PAGE_CACHE_PATH, filename), "w") \
+                    as f:
+                f.write("{")
+        self.assertIsNone(load_cached_page("test"))
+
+    def test_fetching_changed_pages(self):
+        """
+        Tests that only changed pages are returned by conditional fetches
+        :return: None
+        """
+        responses = {"content": b"A", "etag": "1"}
+        sent_headers = []
+
+        def get(_, headers, timeout):
+            """
+            Mocks a server that supports ETags
+            :param headers: The request headers
+            :param timeout: The request timeout
+            :return: The response
+            """
+            self.assertGreater(timeout, 0)
+            sent_headers.append(headers)
+            if headers.get("If-None-Match") == responses["etag"]:
+                return mock.Mock(status_code=304)
+            content = responses["content"]
+            return mock.Mock(
+                status_code=200,
+                content=content,
+                text=content.decode(),
+                headers={"ETag": responses["etag"]}
+            )
+
+        with mock.patch("requests.get", get):
+            page, content = fetch_changed_page("test", "https://example.com")
+            self.assertEqual(content, "A")
+            self.assertNotIn("If-None-Match", sent_headers[0])
+            page.data = "parsed"
+            store_cached_page(page)
+
+            page, content = fetch_changed_page("test", "https://example.com")
+            self.assertIsNone(content)
+            self.assertEqual(page.data, "parsed")
+
+            responses["etag"] = "2"
+            page, content = fetch_changed_page("test", "https://example.com")
+            self.assertIsNone(content)
+            self.assertEqual(page.data, "parsed")
+            self.assertEqual(load_cached_page("test").etag, "2")
+
+            responses.update({"content": b"B", "etag": "3"})
+            page, content = fetch_changed_page("test", "https://example.com")
+            self.assertEqual(content, "B")
+            self.assertIsNone(page.data)
+
+            page, content = fetch_changed_page("test", "https://other.com")
+            self.assertEqual(content, "B")
+            self.assertNotIn("If-None-Match", sent_headers[-1])
+
+    def test_fetching_unavailable_pages(self):
+        """
+        Tests that error responses are neither returned nor cached
+        :return: None
+        """
+        error = mock.Mock(status_code=429, content=b"E", text="E", headers={})
+        success = mock.Mock(
+            status_code=200, content=b"A", text="A", headers={}
+        )
+
+        with mock.patch("requests.get", return_value=error):
+            self.assertIsNone(fetch_changed_page("test", "https://a.com"))
+
+        with mock.patch("requests.get", return_value=success):
+            page, _ = fetch_changed_page("test", "https://a.com")
+            page.data = "parsed"
+            store_cached_page(page)
+
+        with mock.patch("requests.get", return_value=error):
+            page, content = fetch_changed_page("test", "https://a.com")
+            self.assertIsNone(content)
+            self.assertEqual(page.data, "parsed")
+        self.assertEqual(
+            load_cached_page("test").content_hash, page.content_hash
+        )
+
+    def test_fetching_pages_after_request_errors(self):
+        """
+        Tests that failed requests fall back to the cached entry
+        :return: None
+        """
+        success = mock.Mock(
+            status_code=200, content=b"A", text="A", headers={}
+        )
+        errors = [requests.ConnectionError("down"), requests.Timeout("slow")]
+
+        for error in errors:
+            with mock.patch("requests.get", side_effect=error):
+                self.assertIsNone(fetch_changed_page("test", "https://a.com"))
+
+        with mock.patch("requests.get", return_value=success):
+            page, _ = fetch_changed_page("test", "https://a.com")
+            page.data = "parsed"
+            store_cached_page(page)
+
+        for error in errors:
+            with mock.patch("requests.get", side_effect=error):
+                page, content = fetch_changed_page("test", "https://a.com")
+                self.assertIsNone(content)
+                self.assertEqual(page.data, "parsed")
+
+    def test_storing_pages_concurrently(self):
+        """
+        Tests that the same page can be stored by multiple threads at once
+        :return: None
+        """
+        page = CachedPage("test", "https://example.com", None, None, "A", 1)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for future in [
+                executor.submit(store_cached_page, page) for _ in range(64)
+            ]:
+                future.result()
+        self.assertEqual(load_cached_page("test").data, 1)
+        self.assertEqual(len(os.listdir(Config.PAGE_CACHE_PATH)), 1)
@@ -0,0 +1,56 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+from otaku_info.utils.rate_limiting import RateLimiter
+from otaku_info.test.TestFramework import _TestFramework
+
+
+class TestRateLimiting(_TestFramework):
+    """
+    Class that tests the rate limiting utilities
+    """
+
+    def test_spacing_calls(self):
+        """
+        Tests that consecutive calls are spaced out according to the budget
+        :return: None
+        """
+        limiter = RateLimiter(600)
+        start = time.time()
+        for _ in range(4):
+            limiter.wait()
+        self.assertGreaterEqual(time.time() - start, 0.29)
+
+    def test_adapting_to_reported_budget(self):
+        """
+        Tests that calls are only spaced out once the reported
+        remaining budget is running low
+        :return: None
+        """
+        limiter = RateLimiter(60)
+        limiter.update(remaining=50)
+        start = time.time()
+        for _ in range(4):
+            limiter.wait()
+        self.assertLess(time.time() - start, 0.1)
+
+        limiter.update(remaining=1, retry_after=0.2)
+        limiter.wait()
+        self.assertGreaterEqual(time.time() - start, 0.19)
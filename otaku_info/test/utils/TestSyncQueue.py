@@ -0,0 +1,63 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from otaku_info.db.ServiceUsername import ServiceUsername
+from otaku_info.db.SyncQueueEntry import SyncQueueEntry, URGENT_PRIORITY
+from otaku_info.enums import ListService
+from otaku_info.utils.sync_queue import request_sync, get_due_usernames, \
+    mark_synced
+from otaku_info.test.TestFramework import _TestFramework
+
+
+class TestSyncQueue(_TestFramework):
+    """
+    Class that tests the list sync queue
+    """
+
+    def test_prioritizing_users(self):
+        """
+        Tests that requested syncs are moved to the front of the queue and
+        that inactive users are rescheduled
+        :return: None
+        """
+        user_ids = []
+        for i in range(3):
+            user, _, _ = self.generate_sample_user()
+            self.db.session.add(ServiceUsername(
+                user_id=user.id, service=ListService.ANILIST, username=str(i)
+            ))
+            user_ids.append(user.id)
+        self.db.session.commit()
+
+        due = get_due_usernames(ListService.ANILIST, 10)
+        self.assertEqual(len(due), 3)
+        self.assertEqual(SyncQueueEntry.query.count(), 3)
+
+        request_sync(user_ids[2], ListService.ANILIST)
+        request_sync(user_ids[2], ListService.MYANIMELIST)
+        entry = SyncQueueEntry.query.get((user_ids[2], ListService.ANILIST))
+        self.assertEqual(entry.priority, URGENT_PRIORITY)
+        self.assertEqual(SyncQueueEntry.query.count(), 3)
+
+        due = get_due_usernames(ListService.ANILIST, 1)
+        self.assertEqual([x.user_id for x in due], [user_ids[2]])
+
+        mark_synced(get_due_usernames(ListService.ANILIST, 10))
+        due = get_due_usernames(ListService.ANILIST, 10)
+        self.assertEqual([x.user_id for x in due], [user_ids[2]])
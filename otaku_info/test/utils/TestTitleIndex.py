@@ -0,0 +1,93 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+from otaku_info.db.MediaItem import MediaItem
+from otaku_info.enums import ListService, MediaType, MediaSubType, \
+    ReleasingState
+from otaku_info.utils.title_index import TitleIndex, normalize_title
+from otaku_info.test.TestFramework import _TestFramework
+
+
+class TestTitleIndex(_TestFramework):
+    """
+    Class that tests the title index
+    """
+
+    @staticmethod
+    def generate_item(_id: int, english: str, romaji: str) -> MediaItem:
+        """
+        Generates a light novel media item
+        :param _id: The ID of the item
+        :param english: The English title
+        :param romaji: The romaji title
+        :return: The media item
+        """
+        return MediaItem(
+            service=ListService.ANILIST,
+            service_id=str(_id),
+            media_type=MediaType.MANGA,
+            media_subtype=MediaSubType.NOVEL,
+            english_title=english,
+            romaji_title=romaji,
+            cover_url="",
+            releasing_state=ReleasingState.RELEASING
+        )
+
+    def test_normalizing_titles(self):
+        """
+        Tests normalizing titles
+        :return: None
+        """
+        self.assertEqual(
+            normalize_title("The Master of Ragnarök & Blesser of Einherjar"),
+            "the master of ragnarok and blesser of einherjar"
+        )
+        self.assertEqual(
+            normalize_title("Re:ZERO -Starting Life in Another World- "
+                            "(Light Novel)"),
+            "re zero starting life in another world"
+        )
+
+    def test_matching_titles(self):
+        """
+        Tests matching titles exactly and by similarity
+        :return: None
+        """
+        ragnarok = self.generate_item(
+            1,
+            "The Master of Ragnarok & Blesser of Einherjar",
+            "Hyakuren no Haou to Seiyaku no Valkyria"
+        )
+        overlord = self.generate_item(2, None, "Overlord")
+        index = TitleIndex([ragnarok, overlord], 0.7)
+
+        self.assertEqual(
+            index.match("The Master of Ragnarok and Blesser of Einherjar"),
+            (ragnarok, 1.0)
+        )
+        item, similarity = index.match(
+            "The Master of Ragnarok & Blesser of Einherjar Vol"
+        )
+        self.assertEqual(item, ragnarok)
+        self.assertLess(similarity, 1.0)
+        self.assertEqual(index.match("Overlord")[0], overlord)
+        self.assertIsNone(index.match("Overlord of the Ragnarok"))
+        self.assertIsNone(index.match("Overlord of the Ragnarok"))
+        self.assertEqual(
+            index.stats, {"exact": 2, "fuzzy": 1, "unmatched": 1}
+        )
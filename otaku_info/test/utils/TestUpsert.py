@@ -0,0 +1,117 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from otaku_info.db.MediaItem import MediaItem
+from otaku_info.enums import ListService, MediaType, MediaSubType, \
+    ReleasingState
+from otaku_info.utils.upsert import bulk_upsert
+from otaku_info.test.TestFramework import _TestFramework
+
+
+class TestUpsert(_TestFramework):
+    """
+    Class that tests the bulk upsert functionality
+    """
+
+    @staticmethod
+    def generate_media_item(service_id: str, title: str) -> MediaItem:
+        """
+        Generates a media item that has not been added to the session
+        :param service_id: The service ID of the media item
+        :param title: The title of the media item
+        :return: The media item
+        """
+        return MediaItem(
+            service=ListService.ANILIST,
+            service_id=service_id,
+            media_type=MediaType.MANGA,
+            media_subtype=MediaSubType.MANGA,
+            english_title=title,
+            romaji_title=title,
+            cover_url="",
+            releasing_state=ReleasingState.RELEASING
+        )
+
+    def test_upserting_media_items(self):
+        """
+        Tests inserting, updating and skipping media items in bulk
+        :return: None
+        """
+        stats = bulk_upsert(MediaItem, [
+            self.generate_media_item(str(x), "A") for x in range(1000)
+        ])
+        self.db.session.commit()
+        self.assertEqual(stats.inserted, 1000)
+        self.assertEqual(stats.updated, 0)
+        self.assertEqual(stats.unchanged, 0)
+
+        stats = bulk_upsert(MediaItem, [
+            self.generate_media_item("1", "B"),
+            self.generate_media_item("2", "A"),
+            self.generate_media_item("2", "C"),
+            self.generate_media_item("1001", "D")
+        ])
+        self.db.session.commit()
+        self.assertEqual(stats.inserted, 1)
+        self.assertEqual(stats.updated, 2)
+        self.assertEqual(stats.unchanged, 0)
+
+        stats = bulk_upsert(MediaItem, [self.generate_media_item("3", "A")])
+        self.assertEqual(stats.unchanged, 1)
+
+        titles = {
+            x.service_id: x.english_title for x in MediaItem.query.all()
+        }
+        self.assertEqual(len(titles), 1001)
+        self.assertEqual(titles["1"], "B")
+        self.assertEqual(titles["2"], "C")
+        self.assertEqual(titles["1001"], "D")
+        self.assertEqual(titles["3"], "A")
+
+    def test_keeping_maximum_values(self):
+        """
+        Tests that columns that may only be raised are not lowered or
+        cleared by an upsert, like a mangadex refresh after the chapter feed
+        raised the latest release of an item
+        :return: None
+        """
+        item = self.generate_media_item("1", "A")
+        item.latest_release = 57
+        bulk_upsert(MediaItem, [item])
+        self.db.session.commit()
+
+        for latest_release, expected in [(None, 57), (40, 57), (60, 60)]:
+            item = self.generate_media_item("1", "A")
+            item.latest_release = latest_release
+            bulk_upsert(MediaItem, [item], keep_max=["latest_release"])
+            self.db.session.commit()
+            self.assertEqual(
+                MediaItem.query.get(
+                    (ListService.ANILIST, "1", MediaType.MANGA)
+                ).latest_release,
+                expected
+            )
+
+        item = self.generate_media_item("1", "A")
+        item.latest_release = None
+        bulk_upsert(MediaItem, [item])
+        self.db.session.commit()
+        self.assertIsNone(MediaItem.query.get(
+            (ListService.ANILIST, "1", MediaType.MANGA)
+        ).latest_release)
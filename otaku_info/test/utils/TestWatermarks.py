@@ -0,0 +1,42 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+from otaku_info.db.SyncWatermark import SyncWatermark
+from otaku_info.utils.watermarks import load_watermark, store_watermark, \
+    load_watermark_age
+from otaku_info.test.TestFramework import _TestFramework
+
+
+class TestWatermarks(_TestFramework):
+    """
+    Class that tests the sync watermarks
+    """
+
+    def test_storing_watermarks(self):
+        """
+        Tests storing and loading watermarks
+        :return: None
+        """
+        self.assertIsNone(load_watermark("test"))
+        self.assertIsNone(load_watermark_age("test"))
+
+        store_watermark("test", "2021-01-01T00:00:00")
+        store_watermark("test", "2021-02-01T00:00:00")
+        self.assertEqual(load_watermark("test"), "2021-02-01T00:00:00")
+        self.assertLess(load_watermark_age("test"), 5)
+        self.assertEqual(SyncWatermark.query.count(), 1)
@@ -0,0 +1,81 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+import time
+from typing import Optional
+from jerrycan.base import db
+from otaku_info.Config import Config
+from otaku_info.db.JobCheckpoint import JobCheckpoint
+
+
+class TimeBudget:
+    """
+    Keeps track of how much of its time a background job has used up
+    """
+
+    def __init__(self, seconds: Optional[int] = None):
+        """
+        Starts the time budget
+        :param seconds: The length of the budget in seconds.
+                        Defaults to the configured job time budget
+        """
+        self.seconds = Config.JOB_TIME_BUDGET if seconds is None else seconds
+        self.start = time.time()
+
+    def exhausted(self) -> bool:
+        """
+        :return: Whether or not the time budget was used up
+        """
+        return time.time() - self.start >= self.seconds
+
+
+def load_checkpoint(job: str) -> Optional[JobCheckpoint]:
+    """
+    Loads the checkpoint of a job
+    :param job: The name of the job
+    :return: The checkpoint or None if the job has nothing to resume
+    """
+    return JobCheckpoint.query.get(job)
+
+
+def save_checkpoint(job: str, cursor: str):
+    """
+    Saves the progress of a job and commits it
+    :param job: The name of the job
+    :param cursor: The position from which the job should resume
+    :return: None
+    """
+    now = int(time.time())
+    checkpoint = JobCheckpoint.query.get(job)
+    if checkpoint is None:
+        checkpoint = JobCheckpoint(job=job, started_at=now)
+        db.session.add(checkpoint)
+    checkpoint.cursor = cursor
+    checkpoint.last_update = now
+    db.session.commit()
+
+
+def clear_checkpoint(job: str):
+    """
+    Removes the checkpoint of a job once it has finished, so that its next
+    run starts from the beginning
+    :param job: The name of the job
+    :return: None
+    """
+    JobCheckpoint.query.filter_by(job=job).delete()
+    db.session.commit()
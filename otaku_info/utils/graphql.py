@@ -0,0 +1,97 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import json
+import requests
+from typing import Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from puffotter.graphql import GraphQlClient
+from jerrycan.base import app
+from otaku_info.utils.rate_limiting import RateLimiter
+
+
+class RateLimitedGraphQlClient(GraphQlClient):
+    """
+    GraphQL client that reuses HTTP connections and paces its requests
+    using the X-RateLimit-Remaining and Retry-After response headers.
+    A single instance may be shared between threads.
+    """
+
+    def __init__(
+            self,
+            api_url: str,
+            calls_per_minute: int,
+            pool_size: int = 10,
+            retries: int = 3
+    ):
+        """
+        Initializes the GraphQL client
+        :param api_url: The API endpoint URL
+        :param calls_per_minute: The documented rate limit of the API.
+                                 Used until the API reports its actual
+                                 remaining budget.
+        :param pool_size: The maximum amount of kept-alive connections
+        :param retries: How often a rate limited request is retried
+        """
+        super().__init__(api_url)
+        self.rate_limiter = RateLimiter(calls_per_minute)
+        self.retries = retries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def query(
+            self,
+            query_string: str,
+            variables: Optional[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Executes a GraphQL query
+        :param query_string: The query string to use
+        :param variables: The variables to send
+        :return: The response JSON, or None if an error occurred.
+        """
+        if variables is None:
+            variables = {}
+
+        for _ in range(self.retries + 1):
+            self.rate_limiter.wait()
+            resp = self.session.post(self.api_url, json={
+                "query": query_string,
+                "variables": variables
+            })
+
+            remaining = resp.headers.get("X-RateLimit-Remaining")
+            retry_after = resp.headers.get("Retry-After")
+            self.rate_limiter.update(
+                int(remaining) if remaining is not None else None,
+                float(retry_after) if retry_after is not None else None
+            )
+
+            if resp.status_code == 429:
+                app.logger.warning(f"Rate limited by {self.api_url}, "
+                                   f"retrying after {retry_after}s")
+                if retry_after is None:
+                    self.rate_limiter.update(retry_after=60)
+            elif resp.status_code >= 300:
+                return None
+            else:
+                return json.loads(resp.text)
+        return None
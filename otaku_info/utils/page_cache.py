@@ -0,0 +1,166 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+import os
+import json
+import hashlib
+import tempfile
+import requests
+from typing import Optional, Dict, Any, Tuple
+from jerrycan.base import app
+from otaku_info.Config import Config
+
+REQUEST_TIMEOUT = 30
+"""
+The amount of seconds after which a page download is aborted
+"""
+
+
+class CachedPage:
+    """
+    Class that models a downloaded web page as well as the data that was
+    extracted from it
+    """
+
+    def __init__(
+            self,
+            key: str,
+            url: str,
+            etag: Optional[str],
+            last_modified: Optional[str],
+            content_hash: str,
+            data: Any = None
+    ):
+        """
+        Initializes the cached page
+        :param key: The key under which the page is cached
+        :param url: The URL of the page
+        :param etag: The ETag header of the last response
+        :param last_modified: The Last-Modified header of the last response
+        :param content_hash: The SHA256 hash of the page's content
+        :param data: The data that was extracted from the page,
+                     must be serializable as JSON
+        """
+        self.key = key
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_hash = content_hash
+        self.data = data
+
+
+def load_cached_page(key: str) -> Optional[CachedPage]:
+    """
+    Loads a page from the page cache
+    :param key: The key under which the page is cached
+    :return: The cached page or None if it is not cached or unreadable
+    """
+    try:
+        with open(__cache_file(key), "r") as f:
+            return CachedPage(**json.load(f))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, TypeError) as e:
+        app.logger.warning(f"Discarding unreadable cached page {key}: {e}")
+        return None
+
+
+def store_cached_page(page: CachedPage):
+    """
+    Writes a page to the page cache.
+    The cache directory is only accessible by the current user.
+    Pages may be stored concurrently, each write uses its own temporary
+    file that then replaces the cached page.
+    :param page: The page to store
+    :return: None
+    """
+    os.makedirs(Config.PAGE_CACHE_PATH, mode=0o700, exist_ok=True)
+    path = __cache_file(page.key)
+    with tempfile.NamedTemporaryFile(
+            "w", dir=Config.PAGE_CACHE_PATH, suffix=".tmp", delete=False
+    ) as f:
+        json.dump(vars(page), f)
+    os.replace(f.name, path)
+
+
+def fetch_changed_page(
+        key: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None
+) -> Optional[Tuple[CachedPage, Optional[str]]]:
+    """
+    Downloads a page unless it did not change since it was last cached.
+    Uses a conditional request if the cached response contained an ETag or
+    Last-Modified header, and otherwise compares the hash of the content.
+    The returned cache entry of a changed page does not contain any data
+    yet and still needs to be stored.
+    If the page could not be downloaded, either because the request failed
+    or because of an error response, the cached entry is used instead.
+    :param key: The key under which the page is cached
+    :param url: The URL of the page
+    :param headers: Additional request headers
+    :return: The cache entry of the page as well as the page's content
+             or None as the content if the page did not change.
+             None if the page could not be downloaded and is not cached
+    """
+    cached = load_cached_page(key)
+    request_headers = dict(headers or {})
+    if cached is not None and cached.url == url:
+        if cached.etag is not None:
+            request_headers["If-None-Match"] = cached.etag
+        if cached.last_modified is not None:
+            request_headers["If-Modified-Since"] = cached.last_modified
+    else:
+        cached = None
+
+    try:
+        resp = requests.get(
+            url, headers=request_headers, timeout=REQUEST_TIMEOUT
+        )
+    except requests.RequestException as e:
+        app.logger.warning(f"Failed to download {url}: {e}")
+        return None if cached is None else (cached, None)
+    if cached is not None and resp.status_code == 304:
+        return cached, None
+    if resp.status_code != 200:
+        app.logger.warning(f"Failed to download {url} ({resp.status_code})")
+        return None if cached is None else (cached, None)
+
+    content_hash = hashlib.sha256(resp.content).hexdigest()
+    page = CachedPage(
+        key,
+        url,
+        resp.headers.get("ETag"),
+        resp.headers.get("Last-Modified"),
+        content_hash
+    )
+    if cached is not None and cached.content_hash == content_hash:
+        page.data = cached.data
+        store_cached_page(page)
+        return page, None
+    return page, resp.text
+
+
+def __cache_file(key: str) -> str:
+    """
+    Determines the path of the file in which a page is cached
+    :param key: The key under which the page is cached
+    :return: The path to the cache file
+    """
+    filename = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return os.path.join(Config.PAGE_CACHE_PATH, filename + ".json")
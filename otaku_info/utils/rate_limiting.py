@@ -0,0 +1,82 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+from threading import Lock
+from typing import Optional
+
+
+class RateLimiter:
+    """
+    Thread-safe rate limiter that spaces out calls to an external service
+    so that a budget of calls per minute is not exceeded.
+    If the service reports its remaining budget, calls are only spaced out
+    once that budget is running low.
+    """
+
+    def __init__(self, calls_per_minute: int, reserve: int = 5):
+        """
+        Initializes the rate limiter
+        :param calls_per_minute: The maximum amount of calls per minute
+        :param reserve: If the service reports fewer remaining calls than
+                        this, calls are spaced out again
+        """
+        self.min_interval = 60 / max(1, calls_per_minute)
+        self.interval = self.min_interval
+        self.reserve = reserve
+        self.next_slot = 0.0
+        self.blocked_until = 0.0
+        self.lock = Lock()
+
+    def wait(self):
+        """
+        Blocks until the caller is allowed to make the next call
+        :return: None
+        """
+        with self.lock:
+            now = time.time()
+            slot = max(now, self.next_slot, self.blocked_until)
+            self.next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def update(
+            self,
+            remaining: Optional[int] = None,
+            retry_after: Optional[float] = None
+    ):
+        """
+        Adjusts the pacing of calls based on information reported
+        by the service, for example using rate limit headers
+        :param remaining: The amount of calls remaining in the current window
+        :param retry_after: The amount of seconds to wait before
+                            the next call may be made
+        :return: None
+        """
+        with self.lock:
+            now = time.time()
+            if retry_after is not None:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+            if remaining is not None:
+                if remaining > self.reserve:
+                    self.interval = 0
+                    self.next_slot = min(self.next_slot, now)
+                else:
+                    self.interval = self.min_interval
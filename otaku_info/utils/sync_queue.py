@@ -0,0 +1,132 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+from typing import List, Set
+from jerrycan.base import db
+from otaku_info.db.ServiceUsername import ServiceUsername
+from otaku_info.db.SyncQueueEntry import SyncQueueEntry, URGENT_PRIORITY, \
+    DEFAULT_PRIORITY
+from otaku_info.db.NotificationSetting import NotificationSetting
+from otaku_info.enums import ListService
+
+
+def request_sync(user_id: int, service: ListService):
+    """
+    Moves a user's list sync to the front of the sync queue and records
+    the user as active.
+    Does nothing if the user has no username for the service.
+    :param user_id: The ID of the user
+    :param service: The service to sync
+    :return: None
+    """
+    entry = SyncQueueEntry.query.get((user_id, service))
+    if entry is None:
+        if ServiceUsername.query.get((user_id, service)) is None:
+            return
+        entry = SyncQueueEntry(user_id=user_id, service=service)
+        db.session.add(entry)
+
+    entry.priority = URGENT_PRIORITY
+    entry.next_sync = 0
+    entry.last_activity = int(time.time())
+    db.session.commit()
+
+
+def get_due_usernames(service: ListService, limit: int) \
+        -> List[ServiceUsername]:
+    """
+    Retrieves the usernames whose lists are due to be synced.
+    Usernames that have not been queued yet are added to the queue first.
+    :param service: The service for which to retrieve the usernames
+    :param limit: The maximum amount of usernames to retrieve
+    :return: The usernames, ordered by priority and due time
+    """
+    queued = set(
+        user_id for user_id, in
+        db.session.query(SyncQueueEntry.user_id).filter_by(service=service)
+    )
+    for user_id, in db.session.query(ServiceUsername.user_id)\
+            .filter_by(service=service):
+        if user_id not in queued:
+            db.session.add(SyncQueueEntry(user_id=user_id, service=service))
+    db.session.commit()
+
+    return ServiceUsername.query\
+        .join(SyncQueueEntry)\
+        .filter(ServiceUsername.service == service)\
+        .filter(SyncQueueEntry.next_sync <= int(time.time()))\
+        .order_by(SyncQueueEntry.priority, SyncQueueEntry.next_sync)\
+        .limit(limit)\
+        .all()
+
+
+def mark_synced(usernames: List[ServiceUsername]):
+    """
+    Reschedules the list syncs of users after their lists were synced.
+    Users that were active recently or that receive notifications are
+    synced again right away, the longer a user was inactive, the less
+    often the user's lists are synced.
+    :param usernames: The usernames whose lists were synced
+    :return: None
+    """
+    now = int(time.time())
+    notified = __load_notified_user_ids()
+    day = 60 * 60 * 24
+
+    entries = {
+        (x.user_id, x.service): x
+        for x in SyncQueueEntry.query.filter(
+            SyncQueueEntry.user_id.in_(  # type: ignore
+                [x.user_id for x in usernames]
+            )
+        )
+    }
+
+    for username in usernames:
+        entry = entries.get((username.user_id, username.service))
+        if entry is None:
+            entry = SyncQueueEntry(
+                user_id=username.user_id, service=username.service
+            )
+            db.session.add(entry)
+
+        inactive = now - entry.last_activity if entry.last_activity else None
+        if username.user_id in notified \
+                or (inactive is not None and inactive < 7 * day):
+            interval = 0
+        elif inactive is not None and inactive < 30 * day:
+            interval = 60 * 60
+        else:
+            interval = 6 * 60 * 60
+
+        entry.priority = DEFAULT_PRIORITY
+        entry.last_sync = now
+        entry.next_sync = now + interval
+    db.session.commit()
+
+
+def __load_notified_user_ids() -> Set[int]:
+    """
+    :return: The IDs of all users that enabled any notifications
+    """
+    return set(
+        user_id for user_id, in
+        db.session.query(NotificationSetting.user_id).filter_by(value=True)
+    )
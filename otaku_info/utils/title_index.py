@@ -0,0 +1,137 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+import re
+import unicodedata
+from typing import Dict, List, Set, Tuple, Optional, Iterable
+from otaku_info.db.MediaItem import MediaItem
+
+
+def normalize_title(title: str) -> str:
+    """
+    Normalizes a title so that different spellings of it can be compared
+    :param title: The title to normalize
+    :return: The normalized title
+    """
+    title = unicodedata.normalize("NFKD", title)
+    title = "".join(x for x in title if not unicodedata.combining(x))
+    title = title.lower().replace("&", " and ")
+    title = re.sub(r"\((light )?novel\)|\(ln\)", " ", title)
+    return " ".join(re.sub(r"[^\w]+", " ", title).split())
+
+
+def title_ngrams(normalized: str, n: int = 3) -> Set[str]:
+    """
+    Splits a normalized title into character n-grams
+    :param normalized: The normalized title
+    :param n: The length of the n-grams
+    :return: The n-grams
+    """
+    padded = f" {normalized} "
+    return {padded[i:i + n] for i in range(max(1, len(padded) - n + 1))}
+
+
+class TitleIndex:
+    """
+    In-memory index that matches titles against the titles of media items
+    using their normalized titles and the overlap of their character n-grams
+    """
+
+    def __init__(
+            self,
+            media_items: Iterable[MediaItem],
+            threshold: float = 0.8,
+            n: int = 3
+    ):
+        """
+        Builds the index
+        :param media_items: The media items to index
+        :param threshold: The minimum similarity of a match, between 0 and 1
+        :param n: The length of the n-grams
+        """
+        self.threshold = threshold
+        self.n = n
+        self.items: List[MediaItem] = []
+        self.sizes: List[int] = []
+        self.exact: Dict[str, int] = {}
+        self.postings: Dict[str, List[int]] = {}
+        self.cache: Dict[str, Optional[Tuple[MediaItem, float]]] = {}
+        self.stats: Dict[str, int] = {"exact": 0, "fuzzy": 0, "unmatched": 0}
+
+        for media_item in media_items:
+            titles = {media_item.romaji_title, media_item.english_title}
+            for title in titles:
+                if title is None:
+                    continue
+                normalized = normalize_title(title)
+                if normalized == "":
+                    continue
+                entry = len(self.items)
+                ngrams = title_ngrams(normalized, n)
+                self.items.append(media_item)
+                self.sizes.append(len(ngrams))
+                self.exact.setdefault(normalized, entry)
+                for ngram in ngrams:
+                    self.postings.setdefault(ngram, []).append(entry)
+
+    def match(self, title: str) -> Optional[Tuple[MediaItem, float]]:
+        """
+        Finds the media item whose title is the most similar to a title.
+        Results are cached and counted in the index's statistics.
+        :param title: The title to match
+        :return: The media item and the similarity of the titles
+                 or None if no title is similar enough
+        """
+        if title in self.cache:
+            return self.cache[title]
+
+        normalized = normalize_title(title)
+        entry = self.exact.get(normalized)
+        if entry is not None:
+            result: Optional[Tuple[MediaItem, float]] = \
+                (self.items[entry], 1.0)
+            self.stats["exact"] += 1
+        else:
+            result = self.__fuzzy_match(normalized)
+            self.stats["fuzzy" if result is not None else "unmatched"] += 1
+
+        self.cache[title] = result
+        return result
+
+    def __fuzzy_match(self, normalized: str) \
+            -> Optional[Tuple[MediaItem, float]]:
+        """
+        Finds the most similar title using the Jaccard similarity of the
+        titles' n-grams
+        :param normalized: The normalized title to match
+        :return: The media item and the similarity of the titles
+                 or None if no title is similar enough
+        """
+        ngrams = title_ngrams(normalized, self.n)
+        shared: Dict[int, int] = {}
+        for ngram in ngrams:
+            for entry in self.postings.get(ngram, []):
+                shared[entry] = shared.get(entry, 0) + 1
+
+        best: Optional[Tuple[MediaItem, float]] = None
+        for entry, count in shared.items():
+            similarity = count / (len(ngrams) + self.sizes[entry] - count)
+            if similarity >= self.threshold and \
+                    (best is None or similarity > best[1]):
+                best = (self.items[entry], similarity)
+        return best
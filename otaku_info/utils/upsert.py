@@ -0,0 +1,223 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from typing import List, Dict, Any, Tuple, Type, Iterable
+from sqlalchemy import and_, or_, tuple_, bindparam, func
+from sqlalchemy.inspection import inspect
+from sqlalchemy.dialects.postgresql import insert as postgres_insert
+from jerrycan.base import db
+
+
+class UpsertStats:
+    """
+    Keeps track of the rows written by a bulk upsert
+    """
+
+    def __init__(self, table: str):
+        """
+        Initializes the statistics
+        :param table: The name of the table
+        """
+        self.table = table
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+
+    def __str__(self) -> str:
+        """
+        :return: A string representation of the statistics
+        """
+        return f"{self.table}: {self.inserted} inserted, " \
+               f"{self.updated} updated, {self.unchanged} unchanged"
+
+
+def bulk_upsert(
+        model: Type[db.Model],
+        instances: Iterable[db.Model],
+        batch_size: int = 500,
+        keep_max: Iterable[str] = ()
+) -> UpsertStats:
+    """
+    Inserts or updates model instances in batches.
+    Unlike db.session.merge, this does not issue a SELECT per row.
+    Instead, the existing rows of each batch are loaded with a single query,
+    rows that did not change are skipped and the remaining rows are written
+    using a single statement per batch.
+    On PostgreSQL, INSERT ... ON CONFLICT DO UPDATE is used, other database
+    backends use separate INSERT and UPDATE statements.
+    Like merge, only attributes that were set on the instances are written.
+    The changes are not committed.
+    :param model: The database model of the instances
+    :param instances: The instances to upsert
+    :param batch_size: The maximum amount of rows written per statement
+    :param keep_max: Columns whose stored values may only be raised.
+                     Lower or missing values do not overwrite them.
+    :return: Statistics about the inserted, updated and unchanged rows
+    """
+    table = model.__table__
+    stats = UpsertStats(table.name)
+    keep_max = list(keep_max)
+    primary_keys = [column.name for column in table.primary_key.columns]
+
+    rows: Dict[Tuple, Dict[str, Any]] = {}
+    for instance in instances:
+        state = inspect(instance)
+        row = {
+            column.name: state.dict[column.key]
+            for column in table.columns
+            if column.key in state.dict
+        }
+        rows[tuple(row[key] for key in primary_keys)] = row
+
+    # Keep the amount of bound parameters per query below SQLite's limit
+    select_batch_size = min(batch_size, max(1, 900 // len(primary_keys)))
+    keys = list(rows.keys())
+    for i in range(0, len(keys), select_batch_size):
+        batch = {key: rows[key] for key in keys[i:i + select_batch_size]}
+        existing = __load_existing(table, primary_keys, list(batch.keys()))
+
+        to_insert: List[Dict[str, Any]] = []
+        to_update: List[Dict[str, Any]] = []
+        for key, row in batch.items():
+            current = existing.get(key)
+            if current is not None:
+                for column in keep_max:
+                    stored = current[column]
+                    if column in row and stored is not None and \
+                            (row[column] is None or row[column] < stored):
+                        row[column] = stored
+
+            if current is None:
+                to_insert.append(row)
+            elif any(current[key] != value for key, value in row.items()):
+                to_update.append(row)
+            else:
+                stats.unchanged += 1
+
+        __write_rows(table, primary_keys, to_insert, to_update, keep_max)
+        stats.inserted += len(to_insert)
+        stats.updated += len(to_update)
+
+    return stats
+
+
+def __load_existing(
+        table: db.Table,
+        primary_keys: List[str],
+        keys: List[Tuple]
+) -> Dict[Tuple, Dict[str, Any]]:
+    """
+    Loads the existing rows for a list of primary keys using a single query
+    :param table: The table to query
+    :param primary_keys: The names of the primary key columns
+    :param keys: The primary keys to load
+    :return: The existing rows, mapped to their primary keys
+    """
+    if len(keys) == 0:
+        return {}
+
+    columns = [table.columns[key] for key in primary_keys]
+    if db.engine.dialect.name == "postgresql":
+        condition = tuple_(*columns).in_(keys)
+    else:
+        condition = or_(*[
+            and_(*[column == value for column, value in zip(columns, key)])
+            for key in keys
+        ])
+
+    results = db.session.execute(table.select().where(condition))
+    existing = {}
+    for result in results:
+        row = dict(result.items())
+        existing[tuple(row[key] for key in primary_keys)] = row
+    return existing
+
+
+def __write_rows(
+        table: db.Table,
+        primary_keys: List[str],
+        to_insert: List[Dict[str, Any]],
+        to_update: List[Dict[str, Any]],
+        keep_max: List[str]
+):
+    """
+    Writes new and changed rows to the database
+    :param table: The table to write to
+    :param primary_keys: The names of the primary key columns
+    :param to_insert: The rows to insert
+    :param to_update: The rows to update
+    :param keep_max: Columns whose stored values may only be raised
+    :return: None
+    """
+    if db.engine.dialect.name == "postgresql":
+        for rows in __group_by_columns(to_insert + to_update):
+            statement = postgres_insert(table)
+            updated_columns = {
+                key: statement.excluded[key]
+                for key in rows[0].keys()
+                if key not in primary_keys
+            }
+            for key in keep_max:
+                if key in updated_columns:
+                    # Guards against values raised since the rows were read
+                    updated_columns[key] = func.greatest(
+                        table.columns[key], statement.excluded[key]
+                    )
+            if len(updated_columns) == 0:
+                statement = statement.on_conflict_do_nothing(
+                    index_elements=primary_keys
+                )
+            else:
+                statement = statement.on_conflict_do_update(
+                    index_elements=primary_keys,
+                    set_=updated_columns
+                )
+            db.session.execute(statement, rows)
+        return
+
+    for rows in __group_by_columns(to_insert):
+        db.session.execute(table.insert(), rows)
+
+    for rows in __group_by_columns(to_update):
+        statement = table.update().where(and_(*[
+            table.columns[key] == bindparam(f"_{key}")
+            for key in primary_keys
+        ]))
+        db.session.execute(statement, [
+            {
+                (f"_{key}" if key in primary_keys else key): value
+                for key, value in row.items()
+            }
+            for row in rows
+        ])
+
+
+def __group_by_columns(rows: List[Dict[str, Any]]) \
+        -> List[List[Dict[str, Any]]]:
+    """
+    Groups rows by the columns they define.
+    This is necessary since all rows of a single executemany call
+    must share the same columns.
+    :param rows: The rows to group
+    :return: The grouped rows
+    """
+    groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row.keys())), []).append(row)
+    return list(groups.values())
@@ -0,0 +1,61 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+import time
+from typing import Optional
+from jerrycan.base import db
+from otaku_info.db.SyncWatermark import SyncWatermark
+
+
+def load_watermark(name: str) -> Optional[str]:
+    """
+    Loads the value of a watermark
+    :param name: The name of the watermark
+    :return: The value of the watermark or None if it was never stored
+    """
+    watermark = SyncWatermark.query.get(name)
+    return None if watermark is None else watermark.value
+
+
+def load_watermark_age(name: str) -> Optional[int]:
+    """
+    Calculates how long ago a watermark was last stored
+    :param name: The name of the watermark
+    :return: The age of the watermark in seconds
+             or None if it was never stored
+    """
+    watermark = SyncWatermark.query.get(name)
+    if watermark is None:
+        return None
+    return int(time.time()) - watermark.last_update
+
+
+def store_watermark(name: str, value: str):
+    """
+    Stores the value of a watermark and commits it
+    :param name: The name of the watermark
+    :param value: The new value of the watermark
+    :return: None
+    """
+    watermark = SyncWatermark.query.get(name)
+    if watermark is None:
+        watermark = SyncWatermark(name=name)
+        db.session.add(watermark)
+    watermark.value = value
+    watermark.last_update = int(time.time())
+    db.session.commit()
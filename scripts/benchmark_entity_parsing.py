@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+import sys
+import time
+import tracemalloc
+from typing import Callable, List, Any
+from bs4 import BeautifulSoup
+from otaku_info.enums import MediaType
+from otaku_info.external.entities.RedditLnRelease import RedditLnRelease
+from otaku_info.external.entities.MangadexItem import MangadexItem
+from otaku_info.external.entities.AnilistItem import AnilistItem
+from otaku_info.external.entities.MyanimelistItem import MyanimelistItem
+
+
+def reddit_inputs(amount: int) -> List[Any]:
+    """
+    Generates td tags of reddit LN releases
+    :param amount: The amount of distinct rows to generate
+    :return: The td tags of the rows
+    """
+    rows = "".join(
+        f"<tr><td>March {i % 28 + 1}</td>"
+        f"<td><a href='https://myanimelist.net/manga/{i}/x'>S{i}</a></td>"
+        f"<td>{i}</td><td><a href='https://example.com'>Yen Press</a></td>"
+        f"<td>Physical, Digital</td></tr>"
+        for i in range(amount)
+    )
+    soup = BeautifulSoup(f"<table>{rows}</table>", "html.parser")
+    return [row.find_all("td") for row in soup.find_all("tr")]
+
+
+def mangadex_input(i: int) -> Any:
+    """
+    Generates the JSON data of a mangadex item
+    :param i: The index of the item
+    :return: The JSON data
+    """
+    return {
+        "id": f"{i:036d}",
+        "attributes": {
+            "title": {"en": f"Title {i}"},
+            "altTitles": [{"jp": f"Taitoru {i}"}],
+            "links": {"al": str(i), "mal": str(i), "mu": str(i)},
+            "lastChapter": str(i % 200),
+            "status": "ongoing",
+            "updatedAt": "2021-01-01T00:00:00+00:00"
+        },
+        "relationships": [{"type": "cover_art", "id": str(i)}]
+    }
+
+
+def anilist_input(i: int) -> Any:
+    """
+    Generates the query data of an anilist item
+    :param i: The index of the item
+    :return: The query data
+    """
+    return {
+        "id": 200000 + i,
+        "idMal": i,
+        "format": "MANGA",
+        "status": "RELEASING",
+        "title": {"english": f"Title {i}", "romaji": f"Taitoru {i}"},
+        "coverImage": {"large": "https://example.com"},
+        "chapters": i % 200,
+        "volumes": None,
+        "episodes": None,
+        "nextAiringEpisode": None,
+        "relations": {"edges": [{
+            "node": {"id": i + 1, "type": "MANGA"},
+            "relationType": "SEQUEL"
+        }]}
+    }
+
+
+def myanimelist_input(i: int) -> Any:
+    """
+    Generates the query data of a myanimelist item
+    :param i: The index of the item
+    :return: The query data
+    """
+    return {
+        "mal_id": i,
+        "type": "Light Novel",
+        "status": "Publishing",
+        "title": f"Taitoru {i}",
+        "title_english": f"Title {i}",
+        "image_url": "https://example.com",
+        "volumes": i % 20,
+        "related": {
+            "Adaptation": [{"type": "anime", "mal_id": i}],
+            "Spin-off": [{"type": "manga", "mal_id": i + 1}]
+        }
+    }
+
+
+def benchmark(name: str, parse: Callable[[int], Any],
+              read: Callable[[Any], Any], amount: int):
+    """
+    Measures parsing entities, reading their derived fields and the memory
+    needed to keep them around
+    :param name: The name of the benchmark
+    :param parse: Parses the entity with a given index
+    :param read: Reads the derived fields of an entity
+    :param amount: The amount of entities to parse
+    :return: None
+    """
+    start = time.process_time()
+    items = [parse(i) for i in range(amount)]
+    parse_time = time.process_time() - start
+
+    start = time.process_time()
+    for item in items:
+        read(item)
+    read_time = time.process_time() - start
+    del items
+
+    tracemalloc.start()
+    items = [parse(i) for i in range(amount)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del items
+
+    print(f"{name}: parse {parse_time:.2f}s, "
+          f"derived fields {read_time:.2f}s, "
+          f"{size / 1024 / 1024:.1f} MiB retained")
+
+
+def main():
+    """
+    Parses 100k entities of each external entity type
+    Usage: benchmark_entity_parsing.py [amount]
+    :return: None
+    """
+    amount = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    reddit_rows = reddit_inputs(1000)
+    benchmark(
+        "RedditLnRelease.from_parts",
+        lambda i: RedditLnRelease.from_parts(
+            2021, reddit_rows[i % len(reddit_rows)]
+        ),
+        lambda x: (x.release_date, x.release_date_string, x.myanimelist_id),
+        amount
+    )
+    mangadex_inputs = [mangadex_input(i) for i in range(amount)]
+    benchmark(
+        "MangadexItem.from_json",
+        lambda i: MangadexItem.from_json(mangadex_inputs[i]),
+        lambda x: (x.total_chapters, x.releasing_state),
+        amount
+    )
+    anilist_inputs = [anilist_input(i) for i in range(amount)]
+    benchmark(
+        "AnilistItem.from_query",
+        lambda i: AnilistItem.from_query(MediaType.MANGA, anilist_inputs[i]),
+        lambda x: (x.latest_release, x.myanimelist_id),
+        amount
+    )
+    myanimelist_inputs = [myanimelist_input(i) for i in range(amount)]
+    benchmark(
+        "MyanimelistItem.from_query",
+        lambda i: MyanimelistItem.from_query(
+            MediaType.MANGA, myanimelist_inputs[i]
+        ),
+        lambda x: x.latest_release,
+        amount
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+import os
+import sys
+import time
+import tracemalloc
+from typing import Tuple, Callable, Any
+from otaku_info.external.reddit import parse_ln_release_page
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+"""
+The directory containing the saved wiki pages.
+The pages are named <year>_<page name>.html
+"""
+
+
+def measure(function: Callable[[], Any], repetitions: int) \
+        -> Tuple[Any, float, int]:
+    """
+    Measures the CPU time and peak memory usage of a function
+    :param function: The function to measure
+    :param repetitions: How often the function is called to measure the
+                        CPU time
+    :return: The function's result, the average CPU time in seconds and the
+             peak memory usage in bytes
+    """
+    start = time.process_time()
+    for _ in range(repetitions):
+        function()
+    cpu_time = (time.process_time() - start) / repetitions
+
+    tracemalloc.start()
+    result = function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, cpu_time, peak
+
+
+def main():
+    """
+    Compares parsing the saved wiki pages as a whole with only parsing the
+    release tables
+    Usage: benchmark_ln_release_parsing.py [fixture dir]
+    :return: None
+    """
+    fixture_dir = sys.argv[1] if len(sys.argv) > 1 else FIXTURE_DIR
+
+    for filename in sorted(os.listdir(fixture_dir)):
+        year_string, page_name = filename.rsplit(".", 1)[0].split("_", 1)
+        year = int(year_string)
+        url = f"https://old.reddit.com/r/LightNovels/wiki/{page_name}"
+        with open(os.path.join(fixture_dir, filename), "r") as f:
+            html = f.read()
+
+        results = {}
+        for tables_only in [False, True]:
+            releases, cpu_time, peak = measure(
+                lambda: parse_ln_release_page(year, url, html, tables_only),
+                5
+            )
+            results[tables_only] = [
+                (x.series_name, x.volume, x.release_date_string)
+                for x in releases
+            ]
+            mode = "tables only" if tables_only else "full page  "
+            print(f"{filename} {mode}: {len(releases)} releases, "
+                  f"{cpu_time * 1000:.1f} ms CPU, "
+                  f"{peak / 1024 / 1024:.1f} MiB peak")
+
+        if results[False] != results[True]:
+            print(f"{filename}: the parsing modes returned different releases")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
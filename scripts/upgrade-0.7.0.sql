@@ -0,0 +1,27 @@
+-- Upgrades an otaku-info 0.6.x database to 0.7.0
+-- New tables are created automatically on startup, this only adds the
+-- columns that were added to existing tables.
+
+-- Adaptive scheduling of manga chapter guesses
+ALTER TABLE manga_chapter_guesses
+    ADD COLUMN IF NOT EXISTS last_change INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE manga_chapter_guesses
+    ADD COLUMN IF NOT EXISTS update_interval INTEGER NOT NULL DEFAULT 3600;
+ALTER TABLE manga_chapter_guesses
+    ADD COLUMN IF NOT EXISTS next_update INTEGER NOT NULL DEFAULT 0;
+CREATE INDEX IF NOT EXISTS ix_manga_chapter_guesses_next_update
+    ON manga_chapter_guesses (next_update);
+
+-- Incremental activity samples of manga chapter guesses
+ALTER TABLE manga_chapter_guesses
+    ADD COLUMN IF NOT EXISTS last_activity_id INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE manga_chapter_guesses
+    ADD COLUMN IF NOT EXISTS progress_samples TEXT NOT NULL DEFAULT '';
+
+-- Chapters released on mangadex as lower bounds of manga chapter guesses
+ALTER TABLE manga_chapter_guesses
+    ADD COLUMN IF NOT EXISTS released_chapter INTEGER;
+
+-- Release periods of manga chapter guesses
+ALTER TABLE manga_chapter_guesses
+    ADD COLUMN IF NOT EXISTS release_history TEXT NOT NULL DEFAULT '';
@@ -0,0 +1,11 @@
+#!/bin/bash
+
+if [ "$1" == "" ] || [ "$2" == "" ]; then
+        echo "Usage: upgrade.sh <container name> <upgrade sql file>"
+        exit 1
+fi
+
+CONTAINER_NAME="$1"
+UPGRADE_SCRIPT="$2"
+
+docker exec -i "$CONTAINER_NAME" bash -c 'psql $POSTGRES_DB -U $POSTGRES_USER -v ON_ERROR_STOP=1' < "$UPGRADE_SCRIPT"